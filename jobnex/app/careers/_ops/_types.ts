@@ -29,7 +29,7 @@ export interface Application {
   email: string;
   cvPath: string;
   documentPath?: string;
-  status: "pending" | "viewed" | "accepted" | "rejected";
+  status: "pending" | "viewed" | "accepted" | "rejected" | "error";
   createdAt: string;
   careerId: number;
   career: {
@@ -407,7 +407,8 @@ export default function CareerPage() {
                                 : "text-foreground"
                             }`}
                           >
-                            {application.status === "pending"
+                            {application.status === "pending" ||
+                            application.status === "error"
                               ? "Under Review"
                               : application.status === "viewed"
                               ? "Viewed"
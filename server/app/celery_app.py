@@ -1,12 +1,13 @@
 # app/celery_app.py
 from celery import Celery
+from celery.schedules import crontab
 import os
 
 celery = Celery(
     'app',
     broker=os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
     backend=os.getenv('REDIS_URL', 'redis://localhost:6379/1'),
-    include=['app.email.tasks']
+    include=['app.email.tasks', 'app.screening.tasks', 'app.storage.tasks']
 )
 
 # Optional configuration
@@ -18,5 +19,25 @@ celery.conf.update(
     enable_utc=True,
     task_track_started=True,
     task_time_limit=30 * 60,
-    broker_connection_retry_on_startup=True
+    broker_connection_retry_on_startup=True,
+    # Screening runs on its own queue so it can be scaled independently:
+    #   celery -A app.celery_app worker -Q screening
+    task_routes={'app.screening.tasks.*': {'queue': 'screening'}},
+    worker_prefetch_multiplier=1,
+    beat_schedule={
+        'collect-upload-garbage': {
+            'task': 'app.storage.tasks.collect_upload_garbage',
+            'schedule': crontab(minute=0),
+        },
+        # Return batches claimed by screening tasks that died mid-batch
+        'requeue-stale-screenings': {
+            'task': 'app.screening.tasks.requeue_stale_screenings',
+            'schedule': crontab(minute='*/5'),
+        },
+        # Safety net for notifications whose scheduled flush was lost
+        'flush-status-emails': {
+            'task': 'app.email.tasks.flush_status_emails',
+            'schedule': crontab(),
+        },
+    }
 )
\ No newline at end of file
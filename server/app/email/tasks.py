@@ -1,14 +1,26 @@
 # app/email/tasks.py
+import json
+import logging
+from collections import defaultdict
 from datetime import datetime
-from fastapi import logger
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-from celery import Celery
-from jinja2 import Template
-import os
-from typing import Literal
+from typing import Dict, Iterable, List, Literal, Optional, Tuple
+import redis
+import requests
+from jinja2 import Environment
+from requests.adapters import HTTPAdapter
+from sendgrid.helpers.mail import Mail, Personalization, To
+from app.celery_app import celery
+from conf.config import settings
+from services.metrics import EMAIL_RECIPIENTS, EMAIL_SENDS
 
-celery = Celery('email_tasks', broker=os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+logger = logging.getLogger(__name__)
+
+SENDGRID_SEND_URL = "https://api.sendgrid.com/v3/mail/send"
+MAX_PERSONALIZATIONS = 1000  # SendGrid's per-request limit
+
+# Notifications wait in this Redis list until the next flush coalesces them
+EMAIL_QUEUE = "email:status"
+FLUSH_SCHEDULED = "email:status:flush-scheduled"
 
 # Email template (could also be loaded from a file)
 STATUS_EMAIL_TEMPLATE = """
@@ -50,45 +62,106 @@ STATUS_EMAIL_TEMPLATE = """
 </html>
 """
 
+# Compiled once per worker process instead of once per email
+status_template = Environment(autoescape=True).from_string(STATUS_EMAIL_TEMPLATE)
+
+_redis = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+_session: Optional[requests.Session] = None
+
+
+def get_session() -> requests.Session:
+    """Keep-alive HTTP session to SendGrid, reused by every task in the worker"""
+    global _session
+    if _session is None:
+        # Built lazily so prefork children don't share the parent's sockets
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_maxsize=settings.EMAIL_HTTP_POOL_SIZE))
+        session.headers.update({"Authorization": f"Bearer {settings.SENDGRID_API_KEY}"})
+        _session = session
+    return _session
+
+
+def queue_status_emails(notifications: Iterable[Tuple[str, str, str]]) -> None:
+    """Buffer (email, status, job_title) notifications for the next batched send"""
+    payloads = [json.dumps([email, status, job_title]) for email, status, job_title in notifications]
+    if not payloads:
+        return
+    _redis.rpush(EMAIL_QUEUE, *payloads)
+    # At most one pending flush per EMAIL_BATCH_DELAY, however much was queued
+    if _redis.set(FLUSH_SCHEDULED, 1, nx=True, ex=settings.EMAIL_BATCH_DELAY):
+        flush_status_emails.apply_async(countdown=settings.EMAIL_BATCH_DELAY)
+
+
+def queue_status_email(email: str, status: str, job_title: str) -> None:
+    queue_status_emails([(email, status, job_title)])
+
+
+@celery.task
+def flush_status_emails():
+    """Coalesce buffered notifications into one send per status and job"""
+    # Cleared first so anything queued from now on schedules its own flush
+    _redis.delete(FLUSH_SCHEDULED)
+
+    groups: Dict[Tuple[str, str], Dict[str, None]] = defaultdict(dict)
+    while True:
+        items = _redis.lpop(EMAIL_QUEUE, MAX_PERSONALIZATIONS) or []
+        for item in items:
+            email, status, job_title = json.loads(item)
+            groups[(status, job_title)][email] = None
+        if len(items) < MAX_PERSONALIZATIONS:
+            break
+
+    for (status, job_title), recipients in groups.items():
+        emails = list(recipients)
+        for start in range(0, len(emails), MAX_PERSONALIZATIONS):
+            send_status_emails.delay(emails[start:start + MAX_PERSONALIZATIONS], status, job_title)
+    return sum(len(recipients) for recipients in groups.values())
+
+
 @celery.task(bind=True, max_retries=3)
-def send_status_email(
+def send_status_emails(
     self,
-    email: str,
+    emails: List[str],
     status: Literal["pending", "viewed", "accepted", "rejected"],
-    job_title: str,
-    unsubscribe_url: str = "https://yourdomain.com/unsubscribe"
+    job_title: str
 ):
-    """Send application status email via SendGrid"""
+    """Send one status update to many recipients in a single SendGrid request"""
     try:
-        # Render the template
-        template = Template(STATUS_EMAIL_TEMPLATE)
-        html_content = template.render(
+        html_content = status_template.render(
             status=status,
             job_title=job_title,
             year=datetime.now().year,
-            unsubscribe_url=unsubscribe_url
+            unsubscribe_url=settings.EMAIL_UNSUBSCRIBE_URL
         )
 
-        # Prepare email
         message = Mail(
-            from_email=("recruitment@yourdomain.com", "Your Company Recruitment"),
-            to_emails=email,
+            from_email=(settings.EMAIL_FROM, settings.EMAIL_FROM_NAME),
             subject=f"Application Update: {job_title}",
             html_content=html_content
         )
+        # One personalization per recipient so nobody sees the other addresses
+        for email in emails:
+            personalization = Personalization()
+            personalization.add_to(To(email))
+            message.add_personalization(personalization)
 
-        # Send email
-        sg = SendGridAPIClient(os.getenv("SENDGRID_API_KEY"))
-        response = sg.send(message)
+        response = get_session().post(
+            SENDGRID_SEND_URL,
+            json=message.get(),
+            timeout=settings.EMAIL_HTTP_TIMEOUT
+        )
 
         # Log successful send (status code 2xx means success)
         if 200 <= response.status_code < 300:
-            logger.info(f"Status email sent to {email} for job {job_title}")
+            logger.info(f"Status email sent to {len(emails)} recipients for job {job_title}")
+            EMAIL_SENDS.labels("sent").inc()
+            EMAIL_RECIPIENTS.inc(len(emails))
         else:
-            logger.error(f"SendGrid API error: {response.status_code} - {response.body}")
+            logger.error(f"SendGrid API error: {response.status_code} - {response.text}")
             raise Exception(f"SendGrid API error: {response.status_code}")
 
     except Exception as e:
-        logger.error(f"Failed to send status email to {email}: {str(e)}")
+        logger.error(f"Failed to send status email to {len(emails)} recipients: {str(e)}")
+        EMAIL_SENDS.labels("failed" if self.request.retries >= self.max_retries else "retried").inc()
         # Retry with exponential backoff
-        raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
\ No newline at end of file
+        raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
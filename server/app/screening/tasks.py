@@ -0,0 +1,346 @@
+# app/screening/tasks.py
+import logging
+import time
+import uuid
+from datetime import datetime
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+import redis
+from sqlalchemy import update
+from sqlmodel import Session, select
+from app.celery_app import celery
+from app.email.tasks import queue_status_emails
+from conf.config import settings
+from llm.ai import PROMPT_VERSION, analyze_resumes_batch, model_name
+from models.database import engine
+from models.model import Application, ApplicationAnalysis, ApplicationStatus, CareerPost
+from services.screening import (
+    analysis_record,
+    match_score_of,
+    status_for_analysis,
+    upsert_analyses
+)
+from services.events import publish_status_changes
+from services.metrics import stage
+from services.prescreen import extract_requirement_keywords, prescreen
+from services.utils import decompress_text, extract_text_cached
+
+logger = logging.getLogger(__name__)
+
+# Redis lists holding application IDs waiting for screening, drained in
+# priority order: new applications always go before rescreens.
+NEW_LANE = "screening:new"
+RESCREEN_LANE = "screening:rescreen"
+SCREENING_LANES = (NEW_LANE, RESCREEN_LANE)
+# A task moves the IDs it claims into its own processing lists (one per
+# lane) and takes a lease on them; IDs leave those lists once committed or
+# requeued. requeue_stale_screenings returns what a crashed or killed task
+# left behind once its lease runs out.
+LEASES_KEY = "screening:leases"
+# Failed screening attempts per application ID
+ATTEMPTS_KEY = "screening:attempts"
+ATTEMPTS_TTL = 24 * 60 * 60
+
+# Statuses screening may overwrite; accepted is a recruiter decision
+SCREENABLE_STATUSES = (
+    ApplicationStatus.pending,
+    ApplicationStatus.viewed,
+    ApplicationStatus.rejected,
+    ApplicationStatus.error,
+)
+
+_redis = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+def enqueue_application(application_id: int, rescreen: bool = False) -> None:
+    """Add an application to its screening lane and wake up a worker"""
+    _redis.rpush(RESCREEN_LANE if rescreen else NEW_LANE, application_id)
+    screen_application.delay()
+
+
+def enqueue_applications(application_ids: List[int], rescreen: bool = False) -> None:
+    if not application_ids:
+        return
+    _redis.rpush(RESCREEN_LANE if rescreen else NEW_LANE, *application_ids)
+    # One trigger per batch is enough to drain everything we pushed
+    for _ in range(0, len(application_ids), settings.SCREENING_BATCH_SIZE):
+        screen_application.delay()
+
+
+def lane_depths() -> Dict[str, int]:
+    """Applications waiting in each screening lane"""
+    pipe = _redis.pipeline()
+    for lane in SCREENING_LANES:
+        pipe.llen(lane)
+    return dict(zip(SCREENING_LANES, pipe.execute()))
+
+
+def _processing_key(lane: str, token: str) -> str:
+    return f"{lane}:processing:{token}"
+
+
+def _claim_batch(token: str, size: int) -> List[Tuple[str, int]]:
+    # Lease first, so claimed IDs are never unreachable by the sweeper
+    _redis.zadd(LEASES_KEY, {token: time.time() + settings.SCREENING_LEASE})
+    batch: List[Tuple[str, int]] = []
+    for lane in SCREENING_LANES:
+        remaining = size - len(batch)
+        if remaining <= 0:
+            break
+        pipe = _redis.pipeline(transaction=False)
+        for _ in range(remaining):
+            pipe.lmove(lane, _processing_key(lane, token), "LEFT", "RIGHT")
+        batch.extend(
+            (lane, int(application_id))
+            for application_id in pipe.execute()
+            if application_id is not None
+        )
+    return batch
+
+
+def _settle(token: str, batch: List[Tuple[str, int]]) -> None:
+    """Drop IDs that were committed or requeued from the task's claim"""
+    pipe = _redis.pipeline(transaction=False)
+    for lane, application_id in batch:
+        pipe.lrem(_processing_key(lane, token), 1, application_id)
+    pipe.execute()
+
+
+def _requeue(batch: List[Tuple[str, int]]) -> None:
+    # Put IDs back at the head of their lane so they keep their priority
+    for lane, application_id in reversed(batch):
+        _redis.lpush(lane, application_id)
+
+
+def _failed_attempts(application_ids: List[int]) -> Dict[int, int]:
+    counts = _redis.hmget(ATTEMPTS_KEY, application_ids)
+    return {
+        application_id: int(count)
+        for application_id, count in zip(application_ids, counts)
+        if count
+    }
+
+
+def _mark_failed(application_ids: List[int]) -> None:
+    with Session(engine) as session:
+        session.execute(
+            update(Application)
+            .where(Application.id.in_(application_ids))
+            .where(Application.status.in_(SCREENABLE_STATUSES))
+            .values(status=ApplicationStatus.error, updated_at=datetime.utcnow())
+        )
+        session.commit()
+
+
+def _record_failure(batch: List[Tuple[str, int]]) -> None:
+    """Requeue a failed batch, giving up on IDs out of attempts"""
+    pipe = _redis.pipeline()
+    for _, application_id in batch:
+        pipe.hincrby(ATTEMPTS_KEY, application_id, 1)
+    pipe.expire(ATTEMPTS_KEY, ATTEMPTS_TTL)
+    counts = pipe.execute()[:-1]
+
+    exhausted = [
+        application_id for (_, application_id), count in zip(batch, counts)
+        if count >= settings.SCREENING_MAX_ATTEMPTS
+    ]
+    retry = [item for item, count in zip(batch, counts) if count < settings.SCREENING_MAX_ATTEMPTS]
+    if exhausted:
+        try:
+            _mark_failed(exhausted)
+            _redis.hdel(ATTEMPTS_KEY, *exhausted)
+            logger.error(f"Gave up screening applications {exhausted} after {settings.SCREENING_MAX_ATTEMPTS} attempts")
+        except Exception as e:
+            logger.error(f"Could not mark applications {exhausted} as error: {str(e)}")
+            retry = batch
+    _requeue(retry)
+
+
+def _screen_batch(application_ids: List[int]) -> int:
+    with Session(engine) as session:
+        applications = session.exec(
+            select(Application)
+            .where(Application.id.in_(application_ids))
+            .where(Application.status.in_(SCREENABLE_STATUSES))
+        ).all()
+        career_ids = {application.career_id for application in applications}
+        jobs: Dict[int, CareerPost] = {
+            job.id: job for job in session.exec(
+                select(CareerPost).where(CareerPost.id.in_(career_ids))
+            ).all()
+        }
+        # Rescreens reuse the stored resume text instead of re-parsing the file
+        stored_texts: Dict[int, str] = {}
+        for application_id, resume_text in session.exec(
+            select(ApplicationAnalysis.application_id, ApplicationAnalysis.resume_text)
+            .where(ApplicationAnalysis.application_id.in_(application_ids))
+            .where(ApplicationAnalysis.resume_text.is_not(None))
+        ).all():
+            try:
+                stored_texts[application_id] = decompress_text(resume_text)
+            except Exception as e:
+                # A damaged row falls back to extracting the CV again
+                logger.warning(f"Stored resume text unreadable for application {application_id}: {str(e)}")
+
+    resume_texts: Dict[int, str] = {}
+    analyses: Dict[int, Dict[str, Any]] = {}
+    ambiguous: Dict[int, Dict[int, str]] = defaultdict(dict)  # career_id -> {application_id: text}
+    failed: List[int] = []
+    for application in applications:
+        job = jobs.get(application.career_id)
+        if not job:
+            logger.warning(f"Career post {application.career_id} missing for application {application.id}")
+            failed.append(application.id)
+            continue
+        try:
+            with stage("extract"):
+                resume_text = (
+                    stored_texts.get(application.id)
+                    or extract_text_cached(application.cv_path, application.cv_sha256)
+                )
+        except Exception as e:
+            logger.error(f"Screening failed for application {application.id}: {str(e)}")
+            failed.append(application.id)
+            continue
+
+        resume_texts[application.id] = resume_text
+        keywords = job.requirement_keywords or extract_requirement_keywords(job.requirements)
+        with stage("prescreen"):
+            analysis = prescreen(keywords, resume_text)
+        if analysis:
+            analyses[application.id] = analysis
+        else:
+            ambiguous[job.id][application.id] = resume_text
+
+    # Resumes for the same job share batched model requests
+    for career_id, resumes in ambiguous.items():
+        job = jobs[career_id]
+        analyses.update(analyze_resumes_batch(job.description, resumes, job.title, job.requirements))
+        # Missing means unusable output even after repair; model errors
+        # raise instead, so the batch is requeued under the attempt cap
+        failed.extend(application_id for application_id in resumes if application_id not in analyses)
+
+    # Unreadable CVs and unusable analyses leave pending for good
+    updates = [
+        {"id": application_id, "status": ApplicationStatus.error, "updated_at": datetime.utcnow()}
+        for application_id in failed
+    ]
+    records = []
+    notifications = []
+    for application in applications:
+        analysis = analyses.get(application.id)
+        if analysis is None:
+            continue
+        job = jobs[application.career_id]
+        resume_text = resume_texts[application.id]
+
+        new_status = status_for_analysis(analysis)
+        logger.info(f"Application {application.id} screened as {new_status.value}")
+        # Rescreens that land on the same status don't email the applicant again
+        if new_status != application.status:
+            notifications.append((application.email, new_status.value, job.title))
+        updates.append({
+            "id": application.id,
+            "status": new_status,
+            "match_score": match_score_of(analysis),
+            "updated_at": datetime.utcnow()
+        })
+        records.append(analysis_record(
+            application.id, analysis, resume_text, PROMPT_VERSION, model_name()
+        ))
+
+    if updates:
+        with stage("commit"), Session(engine) as session:
+            session.execute(update(Application), updates)
+            if records:
+                session.execute(upsert_analyses(records))
+            session.commit()
+
+    # Committed: from here on failures are logged, since raising would
+    # requeue the batch and screen (and email) it again
+    try:
+        # Mirror the bulk update onto the loaded rows for the status events
+        by_id = {application.id: application for application in applications}
+        changed = []
+        for row in updates:
+            application = by_id[row["id"]]
+            if any(getattr(application, field) != value for field, value in row.items() if field != "updated_at"):
+                changed.append(application)
+            for field, value in row.items():
+                setattr(application, field, value)
+        publish_status_changes(changed)
+
+        if settings.SENDGRID_API_KEY:
+            queue_status_emails(notifications)
+    except Exception as e:
+        logger.error(f"Status notifications failed after screening commit: {str(e)}")
+
+    if failed:
+        logger.warning(f"Marked {len(failed)} applications as error")
+    return len(records)
+
+
+@celery.task(bind=True, acks_late=True, max_retries=3)
+def screen_application(self):
+    """Screen the next micro-batch of queued applications"""
+    token = uuid.uuid4().hex
+    batch = _claim_batch(token, settings.SCREENING_BATCH_SIZE)
+    if not batch:
+        _redis.zrem(LEASES_KEY, token)
+        return 0
+
+    # IDs that already failed run alone, so one bad application can't keep
+    # sinking the batches it lands in
+    attempts = _failed_attempts([application_id for _, application_id in batch])
+    fresh = [item for item in batch if item[1] not in attempts]
+    units = ([fresh] if fresh else []) + [[item] for item in batch if item[1] in attempts]
+
+    screened = 0
+    error = None
+    for unit in units:
+        application_ids = [application_id for _, application_id in unit]
+        try:
+            screened += _screen_batch(application_ids)
+        except Exception as e:
+            logger.error(f"Screening batch failed: {str(e)}")
+            _record_failure(unit)
+            error = e
+        else:
+            if attempts:
+                _redis.hdel(ATTEMPTS_KEY, *application_ids)
+        _settle(token, unit)
+
+    # Everything claimed is settled; anything we raised before this point
+    # stays leased and is requeued by the sweeper
+    _redis.zrem(LEASES_KEY, token)
+    logger.info(f"Screened {screened}/{len(batch)} applications")
+    if error is not None:
+        raise self.retry(exc=error, countdown=settings.SCREENING_RETRY_DELAY * (self.request.retries + 1))
+    return screened
+
+
+@celery.task
+def requeue_stale_screenings():
+    """Requeue batches claimed by tasks that died before settling them.
+
+    Each returned ID counts as a failed attempt, so an application that
+    keeps crashing its worker is eventually marked error.
+    """
+    requeued = 0
+    for token in _redis.zrangebyscore(LEASES_KEY, 0, time.time()):
+        # Whoever removes the lease owns its lists
+        if not _redis.zrem(LEASES_KEY, token):
+            continue
+        for lane in SCREENING_LANES:
+            key = _processing_key(lane, token)
+            stale = [(lane, int(application_id)) for application_id in _redis.lrange(key, 0, -1)]
+            if stale:
+                _record_failure(stale)
+                requeued += len(stale)
+            _redis.delete(key)
+
+    if requeued:
+        logger.warning(f"Requeued {requeued} applications from expired screening claims")
+        for _ in range(0, requeued, settings.SCREENING_BATCH_SIZE):
+            screen_application.delay()
+    return requeued
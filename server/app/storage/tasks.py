@@ -0,0 +1,12 @@
+# app/storage/tasks.py
+from sqlmodel import Session
+from app.celery_app import celery
+from models.database import engine
+from services.storage import collect_garbage
+
+
+@celery.task
+def collect_upload_garbage():
+    """Remove uploads no application references anymore"""
+    with Session(engine) as session:
+        return collect_garbage(session)
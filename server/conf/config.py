@@ -28,24 +28,109 @@ class Settings(BaseSettings):
     def DATABASE_URL(self):
         return f"postgresql+psycopg2://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def ASYNC_DATABASE_URL(self):
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+
+    # Connection pool (per engine, per process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+
 
     FIREBASE_KEY_PATH: str = "./serviceAccountKey.json"
+    FIREBASE_PROJECT_ID: str = ""  # Token audience; read from the key file when empty
+    AUTH_TOKEN_CACHE_SIZE: int = 10000  # Verified ID tokens kept per process
+    AUTH_TOKEN_CACHE_TTL: int = 300  # Upper bound on reuse, on top of each token's exp
+    ADMIN_UIDS: List[str] = Field(default_factory=list)  # Firebase UIDs allowed on /admin routes
 
     # AI Services
-    GEMINI_API_KEY: str
+    LLM_BACKEND: str = "gemini"  # "gemini" or "stub" (offline load testing)
+    GEMINI_API_KEY: str = ""  # Required by the gemini backend
+    GEMINI_MODEL: str = "gemini-2.0-flash"
+    STUB_LATENCY: float = 1.5  # Mean seconds per stub call
+    STUB_LATENCY_JITTER: float = 0.5  # Standard deviation of stub latency
+    STUB_ERROR_RATE: float = 0.0  # Share of stub calls failing with 503
+    STUB_THROTTLE_RATE: float = 0.0  # Share of stub calls failing with 429
     MIN_MATCH_SCORE: int = 50
+    BATCH_MAX_RESUMES: int = 5  # Resumes packed into one model request
+    BATCH_TOKEN_BUDGET: int = 24000  # Estimated resume tokens per batched request
+    RESUME_TOKEN_BUDGET: int = 3000  # Resume tokens sent per candidate after compaction
+    JOB_TOKEN_BUDGET: int = 1500  # Job title/requirements/description tokens per prompt
+    REPAIR_MAX_CHARS: int = 8000  # Longest malformed reply echoed back in a repair prompt
+
+    # LLM throttling (shared across workers through Redis)
+    LLM_RPM: int = 1000  # Requests per minute across the fleet
+    LLM_TPM: int = 1000000  # Estimated prompt + reply tokens per minute
+    LLM_MIN_CONCURRENCY: int = 1  # Floor for the adaptive per-process limit
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_LATENCY_TARGET: float = 30.0  # Seconds; slower calls count as overload
+    LLM_MAX_RETRIES: int = 4
+    LLM_RETRY_BASE_DELAY: float = 1.0
+    LLM_RETRY_MAX_DELAY: float = 30.0
+
+    # Screening
+    SCREENING_BACKEND: str = "celery"  # "celery" or "inprocess"
+    SCREENING_CONCURRENCY: int = 4  # Concurrent model calls per API worker
+    SCREENING_QUEUE_SIZE: int = 100  # Pending screenings before /apply pushes back
+    SCREENING_BATCH_SIZE: int = 10  # Applications pulled per Celery screening task
+    SCREENING_MAX_ATTEMPTS: int = 3  # Failed screenings before an application is marked error
+    SCREENING_RETRY_DELAY: int = 30  # Seconds before a failed screening is retried, per attempt
+    SCREENING_LEASE: int = 31 * 60  # Seconds a claimed batch waits before requeue; above task_time_limit
+    PRESCREEN_ENABLED: bool = True
+    PRESCREEN_REJECT_BELOW: float = 0.15  # Requirement keyword coverage for auto-reject
+    PRESCREEN_PASS_ABOVE: float = 0.9  # Coverage for auto-pass without an LLM call
+
+    # Ranking
+    RANKING_DIM: int = 1024  # Hashed feature width per resume
+    RANKING_CACHE_MB: int = 256  # Applicant index memory per process
+    RANKING_REFRESH_OVERLAP: int = 60  # Seconds re-scanned per refresh for late commits
+    MATCH_TOP_K: int = 5  # Other roles suggested to an applicant
+    MATCH_MIN_SCORE: float = 0.1
+
+    # Caching
+    ANALYSIS_CACHE_SIZE: int = 1024  # In-process LRU entries
+    ANALYSIS_CACHE_TTL: int = 7 * 24 * 3600  # Redis TTL in seconds
+    EXTRACTION_CACHE_SIZE: int = 512
+    EXTRACTION_CACHE_TTL: int = 30 * 24 * 3600
+    LISTING_CACHE_SIZE: int = 256  # Career listing/category responses per process
+    LISTING_CACHE_TTL: int = 300
 
     # Email Service
     SENDGRID_API_KEY: str
     EMAIL_FROM: str = "recruiter@yourdomain.com"
+    EMAIL_FROM_NAME: str = "Your Company Recruitment"
+    EMAIL_UNSUBSCRIBE_URL: str = "https://yourdomain.com/unsubscribe"
+    EMAIL_BATCH_DELAY: int = 10  # Seconds notifications are buffered before a send
+    EMAIL_HTTP_POOL_SIZE: int = 4  # Keep-alive connections to SendGrid per worker
+    EMAIL_HTTP_TIMEOUT: int = 10
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    SSE_HEARTBEAT: int = 15  # Seconds between keep-alive comments on idle streams
+
+    # Request profiling (off unless PROFILING_ENABLED)
+    PROFILING_ENABLED: bool = False
+    PROFILING_SECRET: str = ""  # HMAC key for signed X-Profile headers
+    PROFILING_SIGNATURE_TTL: int = 300  # Seconds a signed header stays valid
+    PROFILING_SAMPLE_RATE: float = 0.0  # Share of all requests profiled without a header
+    PROFILING_INTERVAL: float = 0.005  # Seconds between stack samples
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_FILES: int = 200
 
     # File Storage
     UPLOAD_DIR: str = "uploads"
     ALLOWED_FILE_TYPES: List[str] = Field(default_factory=lambda: ["pdf", "docx"])
     MAX_FILE_SIZE: int = 5242880  # 5MB
+    UPLOAD_CHUNK_SIZE: int = 1048576  # 1MB streaming chunks
+    UPLOAD_GC_GRACE: int = 3600  # Seconds before an unreferenced blob may be collected
+
+    # Text Extraction
+    EXTRACTION_WORKERS: int = 2  # Extraction processes per API worker
+    EXTRACTION_TIMEOUT: int = 20  # Seconds of parsing per file before its worker is killed
+    EXTRACTION_MAX_PAGES: int = 30
+    EXTRACTION_MAX_CHARS: int = 50000
 
     # Logging Configuration
     LOGGING_CONFIG: Dict[str, Any] = {}
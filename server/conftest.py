@@ -0,0 +1,13 @@
+import os
+
+# Settings requires these; tests never reach a real database or provider
+for name, value in {
+    "SECRET_KEY": "test",
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_DB": "test",
+    "SENDGRID_API_KEY": "",
+}.items():
+    os.environ.setdefault(name, value)
@@ -1,16 +1,113 @@
-import google.generativeai as genai 
-from dotenv import load_dotenv
-import os
+import asyncio
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List
+from conf.config import settings
+from services.cache import TwoTierCache
+from llm.compaction import compact_text, estimate_tokens
+from llm.backends import LLMBackend, create_backend
+from llm.ratelimit import RETRYABLE, call_llm
+from services.metrics import stage
+from llm.parsing import (
+    parse_analysis,
+    parse_batch_analyses,
+    parse_model_analysis,
+    record_repair
+)
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Bump whenever the prompt changes so cached analyses are not reused
+PROMPT_VERSION = "2"
+
+analysis_cache = TwoTierCache(
+    "analysis",
+    maxsize=settings.ANALYSIS_CACHE_SIZE,
+    ttl=settings.ANALYSIS_CACHE_TTL
+)
+
+# Model calls are blocking, so they run on a dedicated pool sized to the
+# screening concurrency cap instead of on the event loop.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.SCREENING_CONCURRENCY,
+    thread_name_prefix="llm"
+)
+
+
+@lru_cache(maxsize=1)
+def get_backend() -> LLMBackend:
+    """Return the shared backend selected by settings.LLM_BACKEND"""
+    return create_backend()
+
+
+def model_name() -> str:
+    return get_backend().model_name
+
+
+# Reply tokens budgeted per candidate when charging the shared TPM bucket
+REPLY_TOKENS = 400
+
+
+def _generate(prompt: str, replies: int = 1, json_mode: bool = False) -> str:
+    """Backend call under the shared rate limit and retry policy"""
+    with stage("llm"):
+        return call_llm(
+            lambda: get_backend().generate(prompt, json_mode),
+            estimate_tokens(prompt) + REPLY_TOKENS * replies
+        )
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def analysis_cache_key(job_desc: str, resume_text: str, job_title: str = "", requirements: str = "") -> str:
+    """Content address of an analysis: inputs, prompt version and model"""
+    payload = "\x1f".join([
+        PROMPT_VERSION,
+        model_name(),
+        _normalize(job_title),
+        _normalize(requirements),
+        _normalize(job_desc),
+        _normalize(resume_text),
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _job_section(job_desc: str, job_title: str, requirements: str) -> str:
+    job = compact_text(
+        f"Title: {job_title}\nRequirements:\n{requirements}\nDescription:\n{job_desc}",
+        settings.JOB_TOKEN_BUDGET
+    )
+    return job.text
+
+
+def _compact_resume(resume_text: str) -> str:
+    resume = compact_text(resume_text, settings.RESUME_TOKEN_BUDGET)
+    logger.info(
+        f"Resume compacted {resume.tokens_before} -> {resume.tokens_after} tokens "
+        f"(saved {resume.tokens_saved})"
+    )
+    return resume.text
+
+
+def analyze_resume(job_desc: str, resume_text: str, job_title: str = "", requirements: str = "") -> str:
+    cache_key = analysis_cache_key(job_desc, resume_text, job_title, requirements)
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-def analyze_resume(job_desc: str, resume_text: str) -> dict:
-    model = genai.GenerativeModel('gemini-2.0-flash')
     prompt = f"""
-    Analyze this resume for a {job_desc} role:
-    {resume_text}
+    Analyze this resume against the job below.
+
+    JOB:
+    {_job_section(job_desc, job_title, requirements)}
+
+    RESUME:
+    {_compact_resume(resume_text)}
 
     Return JSON with:
     - match_score (0-100)
@@ -18,5 +115,162 @@ def analyze_resume(job_desc: str, resume_text: str) -> dict:
     - weaknesses (list)
     - suggested_questions (for interview)
     """
-    response = model.generate_content(prompt)
-    return response.text
\ No newline at end of file
+    reply = _generate(prompt)
+
+    try:
+        with stage("parse"):
+            analysis = parse_model_analysis(reply)
+    except ValueError as e:
+        analysis = _repair_analysis(reply, e)
+
+    # Cache the validated analysis rather than the raw, possibly wrapped reply
+    normalized = json.dumps(analysis)
+    analysis_cache.set(cache_key, normalized)
+    return normalized
+
+
+REPAIR_PROMPT = """
+    Your previous reply could not be used: {error}
+
+    Rewrite it as one JSON object with exactly these keys and nothing else:
+    - match_score (integer 0-100)
+    - strengths (list of strings)
+    - weaknesses (list of strings)
+    - suggested_questions (list of strings)
+
+    PREVIOUS REPLY:
+    {reply}
+    """
+
+
+def _repair_analysis(reply: str, error: Exception) -> Dict[str, Any]:
+    """One bounded retry asking the model to fix its own formatting.
+
+    Only the broken reply is sent back, not the resume, so the repair costs
+    a fraction of the original call. Raises ValueError if it fails too.
+    """
+    logger.warning(f"Unparseable analysis, requesting repair: {str(error)}")
+    prompt = REPAIR_PROMPT.format(error=str(error)[:500], reply=reply[:settings.REPAIR_MAX_CHARS])
+    try:
+        repaired = _generate(prompt, json_mode=True)
+        with stage("parse"):
+            analysis = parse_model_analysis(repaired)
+    except ValueError:
+        record_repair(succeeded=False)
+        logger.error(f"Analysis repair failed; raw reply: {reply[:1000]}")
+        raise
+    record_repair(succeeded=True)
+    return analysis
+
+
+def _pack_batches(resumes: Dict[int, str]) -> List[Dict[int, str]]:
+    """Greedily pack resumes into batches under the prompt token budget"""
+    batches: List[Dict[int, str]] = []
+    current: Dict[int, str] = {}
+    used = 0
+    for application_id, resume_text in resumes.items():
+        tokens = estimate_tokens(resume_text)
+        full = len(current) >= settings.BATCH_MAX_RESUMES or used + tokens > settings.BATCH_TOKEN_BUDGET
+        if current and full:
+            batches.append(current)
+            current, used = {}, 0
+        current[application_id] = resume_text
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _analyze_batch(job: str, batch: Dict[int, str]) -> Dict[int, Dict[str, Any]]:
+    candidates = "\n\n".join(
+        f"=== CANDIDATE {application_id} ===\n{resume_text}"
+        for application_id, resume_text in batch.items()
+    )
+    prompt = f"""
+    Analyze each of the following {len(batch)} resumes against the job below.
+
+    JOB:
+    {job}
+
+    {candidates}
+
+    Return a single JSON object whose keys are the candidate IDs
+    ({", ".join(str(application_id) for application_id in batch)}) and whose
+    values are objects with:
+    - match_score (0-100)
+    - strengths (list)
+    - weaknesses (list)
+    - suggested_questions (for interview)
+    """
+    reply = _generate(prompt, replies=len(batch))
+    with stage("parse"):
+        return parse_batch_analyses(reply, list(batch))
+
+
+def analyze_resumes_batch(
+    job_desc: str,
+    resumes: Dict[int, str],
+    job_title: str = "",
+    requirements: str = ""
+) -> Dict[int, Dict[str, Any]]:
+    """Analyze several resumes for one job with as few requests as possible.
+
+    Cached analyses are served first, the rest are packed several to a
+    request, and any candidate missing from a batch response falls back to a
+    single analyze_resume call. Candidates whose output is still unusable
+    are left out of the result. Quota and availability errors that outlast call_llm's
+    retries are raised instead: falling back per candidate would multiply
+    requests during the very episode that caused them, and analyses finished
+    so far are already cached for the requeued batch.
+    """
+    analyses: Dict[int, Dict[str, Any]] = {}
+    pending: Dict[int, str] = {}
+    for application_id, resume_text in resumes.items():
+        cached = analysis_cache.get(analysis_cache_key(job_desc, resume_text, job_title, requirements))
+        if cached is not None:
+            analyses[application_id] = parse_analysis(cached)
+        else:
+            pending[application_id] = resume_text
+
+    # Pack by compacted size, but keep the raw text for cache keys/fallbacks
+    compacted = {application_id: _compact_resume(text) for application_id, text in pending.items()}
+    job = _job_section(job_desc, job_title, requirements) if pending else ""
+    for packed in _pack_batches(compacted):
+        batch = {application_id: pending[application_id] for application_id in packed}
+        results: Dict[int, Dict[str, Any]] = {}
+        if len(batch) > 1:
+            try:
+                results = _analyze_batch(job, packed)
+            except RETRYABLE:
+                raise
+            except Exception as e:
+                logger.warning(f"Batched analysis of {len(batch)} resumes failed: {str(e)}")
+
+        for application_id, resume_text in batch.items():
+            if application_id in results:
+                analyses[application_id] = results[application_id]
+                analysis_cache.set(
+                    analysis_cache_key(job_desc, resume_text, job_title, requirements),
+                    json.dumps(results[application_id])
+                )
+                continue
+            # Fall back to a single call for entries the batch didn't cover
+            try:
+                analyses[application_id] = parse_analysis(
+                    analyze_resume(job_desc, resume_text, job_title, requirements)
+                )
+            except ValueError as e:
+                # Still unusable after the repair call; other errors propagate
+                # so the caller retries the batch later
+                logger.error(f"Analysis failed for application {application_id}: {str(e)}")
+
+    logger.info(f"Analyzed {len(analyses)}/{len(resumes)} resumes ({len(pending)} uncached)")
+    return analyses
+
+
+async def analyze_resume_async(job_desc: str, resume_text: str, job_title: str = "", requirements: str = "") -> str:
+    """Run analyze_resume on the LLM pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, analyze_resume, job_desc, resume_text, job_title, requirements
+    )
@@ -0,0 +1,107 @@
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Dict
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from conf.config import settings
+
+# Text generation backends. Everything above this module only sees
+# generate(prompt) -> str, so the screening pipeline can run against the
+# real model or a local stand-in chosen by settings.LLM_BACKEND.
+
+CANDIDATE_HEADER = re.compile(r"^[ \t]*=== CANDIDATE (\d+) ===[ \t]*$", re.MULTILINE)
+
+
+class LLMBackend:
+    """Interface every backend implements"""
+
+    # Recorded with each analysis and folded into analysis cache keys
+    model_name: str = ""
+
+    def generate(self, prompt: str, json_mode: bool = False) -> str:
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    def __init__(self, api_key: str, model_name: str):
+        if not api_key:
+            raise RuntimeError("Gemini API key not configured")
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt: str, json_mode: bool = False) -> str:
+        generation_config = {"response_mime_type": "application/json"} if json_mode else None
+        return self._model.generate_content(prompt, generation_config=generation_config).text
+
+
+class StubBackend(LLMBackend):
+    """Offline stand-in with Gemini-like latency and failures.
+
+    Scores are a hash of each candidate's prompt section, so the same input
+    always gets the same analysis; latency and error rates are configurable
+    for load testing queueing, batching and caching without an API key.
+    """
+
+    model_name = "stub"
+
+    def __init__(
+        self,
+        latency: float,
+        latency_jitter: float,
+        error_rate: float,
+        throttle_rate: float,
+        seed: int = 0
+    ):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _analysis(text: str) -> Dict[str, object]:
+        digest = zlib.crc32(text.encode("utf-8"))
+        return {
+            "match_score": digest % 101,
+            "strengths": [f"stub strength {digest % 7}"],
+            "weaknesses": [f"stub weakness {digest % 5}"],
+            "suggested_questions": ["Walk me through your most relevant project."]
+        }
+
+    def generate(self, prompt: str, json_mode: bool = False) -> str:
+        with self._lock:
+            roll = self._random.random()
+            delay = max(0.0, self._random.gauss(self.latency, self.latency_jitter))
+        time.sleep(delay)
+        if roll < self.throttle_rate:
+            raise google_exceptions.ResourceExhausted("Stub quota exceeded")
+        if roll < self.throttle_rate + self.error_rate:
+            raise google_exceptions.ServiceUnavailable("Stub backend unavailable")
+
+        # Batched prompts get one analysis per candidate section
+        parts = CANDIDATE_HEADER.split(prompt)
+        if len(parts) > 1:
+            candidates = dict(zip(parts[1::2], parts[2::2]))
+            return json.dumps({
+                application_id: self._analysis(text) for application_id, text in candidates.items()
+            })
+        return json.dumps(self._analysis(prompt))
+
+
+def create_backend() -> LLMBackend:
+    if settings.LLM_BACKEND == "gemini":
+        return GeminiBackend(settings.GEMINI_API_KEY, settings.GEMINI_MODEL)
+    if settings.LLM_BACKEND == "stub":
+        return StubBackend(
+            settings.STUB_LATENCY,
+            settings.STUB_LATENCY_JITTER,
+            settings.STUB_ERROR_RATE,
+            settings.STUB_THROTTLE_RATE
+        )
+    raise RuntimeError(f"Unknown LLM backend: {settings.LLM_BACKEND}")
@@ -0,0 +1,135 @@
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, NamedTuple, Tuple
+
+# Prompt compaction: strip what the model doesn't need from extracted resume
+# text and fit it into a token budget, keeping the most useful sections.
+
+SECTION_PATTERNS = {
+    "summary": r"summary|profile|objective|about me",
+    "skills": r"(technical |core |key )?skills|technologies|tech stack|competencies|expertise",
+    "experience": r"(work |professional |employment )?(experience|history)|employment|career",
+    "projects": r"projects?|portfolio",
+    "education": r"education|academic|qualifications",
+    "certifications": r"certifications?|licen[cs]es|courses|training",
+}
+SECTION_HEADING = {
+    name: re.compile(rf"^\W*({pattern})\W*$", re.IGNORECASE)
+    for name, pattern in SECTION_PATTERNS.items()
+}
+
+# When the budget is tight, sections are kept in this order
+SECTION_PRIORITY = ["skills", "experience", "summary", "projects", "header", "certifications", "education"]
+
+BOILERPLATE = re.compile(
+    r"^\W*(page \d+( of \d+)?|\d+\s*/\s*\d+|curriculum vitae|resume|r[ée]sum[ée]|"
+    r"references (are )?available (up)?on request\.?|confidential)\W*$",
+    re.IGNORECASE
+)
+HORIZONTAL_SPACE = re.compile(r"[ \t\u00a0\u2000-\u200b]+")
+CONTROL_CHARS = re.compile(r"[\x00-\x08\x0b-\x1f\x7f]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough local token estimate (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class CompactionResult(NamedTuple):
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "tokens_before": 0, "tokens_after": 0}
+
+
+def compaction_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return {**_stats, "tokens_saved": _stats["tokens_before"] - _stats["tokens_after"]}
+
+
+def _clean_lines(text: str) -> List[str]:
+    text = CONTROL_CHARS.sub(" ", text)
+    lines = [HORIZONTAL_SPACE.sub(" ", line).strip() for line in text.splitlines()]
+    lines = [line for line in lines if line and not BOILERPLATE.match(line)]
+
+    # Short lines repeated across pages are headers/footers
+    repeats = Counter(line for line in lines if len(line) < 80)
+    seen = set()
+    cleaned = []
+    for line in lines:
+        if repeats.get(line, 0) > 1:
+            if line in seen:
+                continue
+            seen.add(line)
+        cleaned.append(line)
+    return cleaned
+
+
+def split_sections(lines: List[str]) -> List[Tuple[str, List[str]]]:
+    """Group lines under detected headings; text before the first is 'header'"""
+    sections: List[Tuple[str, List[str]]] = [("header", [])]
+    for line in lines:
+        name = next(
+            (name for name, pattern in SECTION_HEADING.items() if len(line) <= 40 and pattern.match(line)),
+            None
+        )
+        if name:
+            sections.append((name, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(name, body) for name, body in sections if body]
+
+
+def compact_text(text: str, budget_tokens: int) -> CompactionResult:
+    """Collapse whitespace and boilerplate, then fit text to budget_tokens"""
+    tokens_before = estimate_tokens(text)
+    sections = split_sections(_clean_lines(text))
+
+    # Every section first gets a fair share of the budget so none vanishes;
+    # what is left goes to sections by priority, cutting the last line to fit.
+    remaining = budget_tokens
+    kept: List[List[str]] = [[] for _ in sections]
+    position = [0] * len(sections)
+
+    def fill(i: int, allowance: int, cut: bool) -> int:
+        spent = 0
+        body = sections[i][1]
+        while position[i] < len(body) and spent < allowance:
+            line = body[position[i]]
+            cost = estimate_tokens(line)
+            if cost > allowance - spent:
+                if not cut:
+                    break
+                kept[i].append(line[:(allowance - spent) * 4])
+                spent = allowance
+                position[i] = len(body)
+                break
+            kept[i].append(line)
+            spent += cost
+            position[i] += 1
+        return spent
+
+    if sections:
+        share = budget_tokens // len(sections)
+        for i in range(len(sections)):
+            remaining -= fill(i, share, cut=False)
+        for i in sorted(range(len(sections)), key=lambda i: SECTION_PRIORITY.index(sections[i][0])):
+            if remaining <= 0:
+                break
+            remaining -= fill(i, remaining, cut=True)
+
+    compacted = "\n".join(line for body in kept for line in body)
+    result = CompactionResult(compacted, tokens_before, estimate_tokens(compacted))
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["tokens_before"] += result.tokens_before
+        _stats["tokens_after"] += result.tokens_after
+    return result
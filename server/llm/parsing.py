@@ -0,0 +1,158 @@
+import json
+import math
+import re
+import threading
+from typing import Any, Dict, List
+from pydantic import BaseModel, ConfigDict, field_validator
+
+# Tolerant parsing of model output. Models wrap JSON in Markdown fences,
+# surround it with prose or leave trailing commas; all of that is recovered
+# here before validating against the analysis schema.
+
+FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+
+class ResumeAnalysis(BaseModel):
+    """Schema the model's analysis must satisfy"""
+
+    model_config = ConfigDict(extra="ignore")
+
+    match_score: int
+    strengths: List[str] = []
+    weaknesses: List[str] = []
+    suggested_questions: List[str] = []
+
+    @field_validator("match_score", mode="before")
+    @classmethod
+    def _coerce_score(cls, value: Any) -> int:
+        # "85", "85%" and 85.5 all mean 85; out-of-range scores are clamped
+        # ValueError rather than TypeError so pydantic reports it as a
+        # validation error and the repair path runs
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise ValueError(f"match_score must be a number, got {type(value).__name__}")
+        if isinstance(value, str):
+            value = value.strip().rstrip("%")
+        score = float(value)
+        if not math.isfinite(score):
+            raise ValueError(f"match_score must be finite, got {score}")
+        return max(0, min(100, round(score)))
+
+    @field_validator("strengths", "weaknesses", "suggested_questions", mode="before")
+    @classmethod
+    def _coerce_list(cls, value: Any) -> List[str]:
+        if value is None:
+            return []
+        if isinstance(value, (str, dict)):
+            value = [value]
+        if not isinstance(value, (list, tuple)):
+            raise ValueError(f"expected a list, got {type(value).__name__}")
+        return [item if isinstance(item, str) else json.dumps(item) for item in value]
+
+
+_stats_lock = threading.Lock()
+_stats = {"parsed": 0, "recovered": 0, "failed": 0, "repairs": 0, "repaired": 0}
+
+
+def parse_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(key: str) -> None:
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def _balanced(text: str, start: int) -> str:
+    """The JSON object/array opening at start, matched up to its closing bracket"""
+    depth = 0
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def extract_json(raw: str) -> Any:
+    """Decode the first JSON value in raw, however it is wrapped"""
+    text = raw.strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    fence = FENCE.search(text)
+    if fence:
+        text = fence.group(1).strip()
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("No JSON object in model response")
+    candidate = _balanced(text, min(starts))
+    try:
+        return json.loads(candidate)
+    except ValueError:
+        return json.loads(TRAILING_COMMA.sub(r"\1", candidate))
+
+
+def parse_analysis(raw: str) -> Dict[str, Any]:
+    """Extract and validate a single analysis; raises ValueError"""
+    return ResumeAnalysis.model_validate(extract_json(raw)).model_dump()
+
+
+def parse_model_analysis(raw: str) -> Dict[str, Any]:
+    """parse_analysis for fresh model output, counted in parse_stats()"""
+    try:
+        analysis = parse_analysis(raw)
+    except ValueError:
+        _count("failed")
+        raise
+    try:
+        json.loads(raw)
+        _count("parsed")
+    except ValueError:
+        _count("recovered")
+    return analysis
+
+
+def parse_batch_analyses(raw: str, application_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Valid per-candidate analyses from a batch response, keyed by ID.
+
+    Entries that are missing or fail validation are left out so the caller
+    can retry them individually.
+    """
+    results = extract_json(raw)
+    if not isinstance(results, dict):
+        _count("failed")
+        raise ValueError("Batch response is not a JSON object")
+
+    analyses = {}
+    for application_id in application_ids:
+        try:
+            analyses[application_id] = ResumeAnalysis.model_validate(
+                results.get(str(application_id))
+            ).model_dump()
+            _count("parsed")
+        except ValueError:
+            _count("failed")
+    return analyses
+
+
+def record_repair(succeeded: bool) -> None:
+    _count("repairs")
+    if succeeded:
+        _count("repaired")
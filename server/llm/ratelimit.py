@@ -0,0 +1,189 @@
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, TypeVar
+import redis
+from google.api_core import exceptions as google_exceptions
+from conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Client-side throttling for model calls, in three layers:
+# 1. a Redis token bucket for requests and tokens per minute, shared by every
+#    API and Celery worker so the quota is respected fleet-wide;
+# 2. an AIMD concurrency limit per process that halves on 429s or latency
+#    spikes and creeps back up one slot per window of healthy calls;
+# 3. full-jitter exponential retries for quota and transient errors.
+
+# KEYS: bucket per limit; ARGV: capacity/cost pairs, one per key.
+# Buckets refill continuously at capacity per minute. Either every bucket is
+# charged or none is; returns 0 when admitted, else milliseconds to wait.
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local wait = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local cost = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', key, 'level', 'ts')
+    local level = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    level = math.min(capacity, level + (now - ts) * capacity / 60000)
+    levels[i] = level
+    if cost > level then
+        wait = math.max(wait, math.ceil((cost - level) * 60000 / capacity))
+    end
+end
+for i, key in ipairs(KEYS) do
+    local level = levels[i]
+    if wait == 0 then
+        level = level - tonumber(ARGV[i * 2])
+    end
+    redis.call('HSET', key, 'level', level, 'ts', now)
+    redis.call('PEXPIRE', key, 120000)
+end
+return wait
+"""
+
+REQUEST_BUCKET = "llm:bucket:requests"
+TOKEN_BUCKET = "llm:bucket:tokens"
+
+RETRYABLE = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+)
+
+
+class TokenBucket:
+    """Shared requests-per-minute and tokens-per-minute budget.
+
+    Redis errors admit the call: throttling is an optimization and must not
+    take screening down with it.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._redis = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        self._script = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def acquire(self, tokens: int) -> None:
+        # A single oversized prompt can never exceed the whole bucket
+        tokens = max(1, min(tokens, self.tpm))
+        while True:
+            try:
+                wait_ms = int(self._script(
+                    keys=[REQUEST_BUCKET, TOKEN_BUCKET],
+                    args=[self.rpm, 1, self.tpm, tokens]
+                ))
+            except redis.RedisError as e:
+                logger.warning(f"Rate limiter unavailable, admitting call: {str(e)}")
+                return
+            if wait_ms <= 0:
+                return
+            # Jitter so waiters across workers don't retry in lockstep
+            time.sleep(wait_ms / 1000 * random.uniform(1.0, 1.2))
+
+
+class AdaptiveConcurrency:
+    """Concurrency limit tuned by additive increase / multiplicative decrease"""
+
+    DECREASE_COOLDOWN = 1.0
+
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        self.waiting = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            self.waiting += 1
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.waiting -= 1
+            self.in_flight += 1
+
+    def release(self, overloaded: bool) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if overloaded:
+                # Concurrent failures from one overload episode halve once
+                if now - self._last_decrease >= self.DECREASE_COOLDOWN:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+                    logger.warning(f"LLM concurrency reduced to {int(self.limit)}")
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+_bucket = TokenBucket(settings.LLM_RPM, settings.LLM_TPM)
+_concurrency = AdaptiveConcurrency(
+    settings.SCREENING_CONCURRENCY,
+    settings.LLM_MIN_CONCURRENCY,
+    settings.LLM_MAX_CONCURRENCY
+)
+
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "throttled": 0, "retries": 0, "wait_seconds": 0.0}
+
+
+def limiter_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["avg_wait_ms"] = round(stats["wait_seconds"] * 1000 / stats["calls"], 1) if stats["calls"] else 0.0
+    stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+    stats.update(
+        waiting=_concurrency.waiting,
+        in_flight=_concurrency.in_flight,
+        concurrency_limit=int(_concurrency.limit)
+    )
+    return stats
+
+
+def call_llm(fn: Callable[[], T], estimated_tokens: int) -> T:
+    """Run fn under the shared rate limit, adaptive concurrency and retries"""
+    attempt = 0
+    while True:
+        queued_at = time.monotonic()
+        _bucket.acquire(estimated_tokens)
+        _concurrency.acquire()
+        started = time.monotonic()
+        with _stats_lock:
+            _stats["calls"] += 1
+            _stats["wait_seconds"] += started - queued_at
+
+        overloaded = False
+        try:
+            result = fn()
+            overloaded = time.monotonic() - started > settings.LLM_LATENCY_TARGET
+            return result
+        except RETRYABLE as e:
+            overloaded = isinstance(e, google_exceptions.ResourceExhausted)
+            if overloaded:
+                with _stats_lock:
+                    _stats["throttled"] += 1
+            if attempt >= settings.LLM_MAX_RETRIES:
+                raise
+            error = e
+        finally:
+            _concurrency.release(overloaded)
+
+        # Full jitter: anywhere between zero and the exponential ceiling
+        delay = random.uniform(0, min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * 2 ** attempt))
+        attempt += 1
+        with _stats_lock:
+            _stats["retries"] += 1
+        logger.warning(f"LLM call failed ({type(error).__name__}), retry {attempt} in {delay:.1f}s")
+        time.sleep(delay)
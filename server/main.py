@@ -1,19 +1,49 @@
 from contextlib import asynccontextmanager
 from typing import Annotated, Optional
-from fastapi import FastAPI, UploadFile, Depends, HTTPException, status, BackgroundTasks, Form, File
+from fastapi import FastAPI, UploadFile, Depends, HTTPException, status, Form, File, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer
 from fastapi_limiter import FastAPILimiter
 from fastapi_limiter.depends import RateLimiter
 from models.model import *
-from llm.ai import analyze_resume
-from services.tasks import send_status_email
-from services.auth import get_current_user
-from sqlmodel import Session, create_engine, select
+from llm.ai import PROMPT_VERSION, analyze_resume_async, get_backend, model_name
+from llm.parsing import parse_analysis
+from llm.ratelimit import limiter_stats
+from app.email.tasks import queue_status_email
+from services.auth import get_admin_user, get_current_user
+from sqlalchemy import text, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.database import async_engine, async_session
 from conf.config import settings
-from services.utils import save_uploaded_file, extract_text_from_file
-import os
+from services.utils import extract_text_from_file, cached_extracted_text, decompress_text, shutdown_extraction_pool
+from services.storage import store_upload, acquire_blobs
+from services.pagination import encode_cursor, decode_cursor
+from services.prescreen import extract_requirement_keywords, prescreen
+from services.ranking import rank_applicants, upsert_posting, match_postings
+from services.cache import TwoTierCache, cached_json_response
+from services.events import event_hub
+from services.metrics import MetricsMiddleware, render_metrics, stage
+from services.profiling import ProfilingMiddleware, list_profiles, profile_path
+from prometheus_client import CONTENT_TYPE_LATEST
+from services.screening import (
+    start_screening_workers,
+    stop_screening_workers,
+    ensure_screening_capacity,
+    enqueue_screening,
+    enqueue_screenings,
+    retry_screening,
+    screening_queue_depth,
+    analysis_record,
+    match_score_of,
+    status_for_analysis,
+    upsert_analyses
+)
+from app.screening.tasks import SCREENABLE_STATUSES, enqueue_application, enqueue_applications, lane_depths
+import asyncio
+import json
 from typing import List, AsyncIterator
 from datetime import datetime
 import logging
@@ -30,10 +60,67 @@ class CareerPostCreate(BaseModel):
     content: str = ""
 
 
+class CandidateSummary(BaseModel):
+    """Scored applicant without contact details or file paths"""
+    id: int
+    full_name: str
+    status: ApplicationStatus
+    match_score: Optional[int]
+    created_at: datetime
+    updated_at: datetime
+
+
 
 logger = logging.getLogger(__name__)
 
+# Public job board responses; invalidated by every career/category write
+careers_cache = TwoTierCache(
+    "careers",
+    maxsize=settings.LISTING_CACHE_SIZE,
+    ttl=settings.LISTING_CACHE_TTL
+)
+
+
+
+
+# create_all only creates missing tables; columns, indexes and enum values
+# added to existing tables are brought in here. Every statement is idempotent.
+SCHEMA_UPGRADES = (
+    "ALTER TYPE applicationstatus ADD VALUE IF NOT EXISTS 'error'",
+    "ALTER TABLE careerpost ADD COLUMN IF NOT EXISTS requirement_keywords JSON",
+    "ALTER TABLE careerpost ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITHOUT TIME ZONE",
+    # Legacy postings would otherwise sort below every refresh watermark
+    "UPDATE careerpost SET updated_at = posted_at WHERE updated_at IS NULL",
+    "ALTER TABLE careerpost ALTER COLUMN updated_at SET NOT NULL",
+    "ALTER TABLE application ADD COLUMN IF NOT EXISTS cv_sha256 VARCHAR",
+    "ALTER TABLE application ADD COLUMN IF NOT EXISTS match_score INTEGER",
+    "CREATE INDEX IF NOT EXISTS ix_application_cv_sha256 ON application (cv_sha256)",
+    "CREATE INDEX IF NOT EXISTS ix_application_match_score ON application (match_score)",
+    "CREATE INDEX IF NOT EXISTS ix_application_career_score ON application (career_id, match_score)",
+    "CREATE INDEX IF NOT EXISTS ix_application_user_created ON application (user_id, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_careerpost_posted ON careerpost (posted_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_careerpost_category_posted ON careerpost (category_id, posted_at, id)",
+)
+
+
+# The subset of a career post the apply path needs
+APPLY_JOB_FIELDS = {"id", "title", "description", "requirements", "requirement_keywords"}
+
+
+async def get_job(career_id: int) -> Optional[CareerPost]:
+    """Career post for the apply path, served from careers_cache when possible.
 
+    Only APPLY_JOB_FIELDS are populated on cache hits.
+    """
+    cached = await careers_cache.aget(f"job:{career_id}")
+    if cached is not None:
+        return CareerPost(**json.loads(cached))
+
+    async with async_session() as session:
+        job = (await session.exec(select(CareerPost).where(CareerPost.id == career_id))).first()
+    if job:
+        await careers_cache.aset(f"job:{career_id}", json.dumps(job.model_dump(include=APPLY_JOB_FIELDS)))
+    return job
 
 
 @asynccontextmanager
@@ -41,8 +128,10 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     # Startup
     logger.info("Initializing application...")
     try:
-        from models.model import SQLModel
-        SQLModel.metadata.create_all(engine)
+        async with async_engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+            for statement in SCHEMA_UPGRADES:
+                await conn.execute(text(statement))
         logger.info("Database tables created")
 
         redis = await aioredis.from_url(
@@ -52,10 +141,13 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
         )
         await FastAPILimiter.init(redis)
         logger.info("Rate limiter initialized")
+
+        if settings.SCREENING_BACKEND == "inprocess":
+            start_screening_workers(process_application_screening)
         
         # Verify essential services
-        if not settings.GEMINI_API_KEY:
-            raise RuntimeError("Gemini API key not configured")
+        backend = get_backend()
+        logger.info(f"LLM backend: {settings.LLM_BACKEND} ({backend.model_name})")
         if not settings.SENDGRID_API_KEY:
             logger.warning("SendGrid API key not configured - email functions will fail")
         
@@ -69,8 +161,12 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     # Shutdown
     logger.info("Shutting down application...")
     try:
+        await stop_screening_workers()
+        await event_hub.close()
+        shutdown_extraction_pool()
         await FastAPILimiter.close()
         logger.info("Rate limiter closed")
+        await async_engine.dispose()
     except Exception as e:
         logger.error(f"Shutdown error: {str(e)}")
 
@@ -88,16 +184,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
 
-# Database Setup
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800
-)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 # API Routes
 @app.get(
@@ -106,12 +200,15 @@ engine = create_engine(
     summary="Get all career categories",
     dependencies=[Depends(RateLimiter(times=10, seconds=60))]
 )
-async def get_career_categories():
-    try:
-        with Session(engine) as session:
-            categories = session.exec(select(CareerCategory)).all()
+async def get_career_categories(request: Request):
+    async def load():
+        async with async_session() as session:
+            categories = (await session.exec(select(CareerCategory))).all()
             logger.info(f"Retrieved {len(categories)} career categories")
-            return categories
+            return categories, {}
+
+    try:
+        return await cached_json_response(request, careers_cache, "categories", load)
     except Exception as e:
         logger.error(f"Error fetching career categories: {str(e)}")
         raise HTTPException(
@@ -132,10 +229,10 @@ async def create_career_category(
     # user: dict = Depends(get_current_user)
 ):
     try:
-        with Session(engine) as session:
+        async with async_session() as session:
             # Check if category already exists
             print(f"Creating category with name: {name}")
-            existing = session.exec(select(CareerCategory).where(CareerCategory.name == name)).first()
+            existing = (await session.exec(select(CareerCategory).where(CareerCategory.name == name))).first()
             if existing:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -144,8 +241,9 @@ async def create_career_category(
                 
             category = CareerCategory(name=name)
             session.add(category)
-            session.commit()
-            session.refresh(category)
+            await session.commit()
+            await session.refresh(category)
+            await careers_cache.ainvalidate_all()
             
             logger.info(f"New career category created: {category.id} - {category.name}")
             
@@ -173,22 +271,40 @@ async def create_career_category(
     dependencies=[Depends(RateLimiter(times=10, seconds=60))]
 )
 async def get_career_posts(
+    request: Request,
     category_id: Optional[int] = None,
-    limit: int = 10,
-    offset: int = 0
+    limit: int = Query(default=10, ge=1, le=100),
+    offset: int = 0,
+    cursor: Optional[str] = None
 ):
-    try:
-        with Session(engine) as session:
-            query = select(CareerPost).order_by(CareerPost.posted_at.desc())
+    # Keyset paging when a cursor is given; offset paging kept for old clients
+    after = decode_cursor(cursor) if cursor else None
+
+    async def load():
+        async with async_session() as session:
+            query = select(CareerPost).order_by(CareerPost.posted_at.desc(), CareerPost.id.desc())
             
             if category_id:
                 query = query.where(CareerPost.category_id == category_id)
-                
-            query = query.limit(limit).offset(offset)
-            
-            careers = session.exec(query).all()
+
+            if after:
+                query = query.where(tuple_(CareerPost.posted_at, CareerPost.id) < tuple_(*after))
+            else:
+                query = query.offset(offset)
+
+            # Fetch one extra row to learn whether another page exists
+            careers = (await session.exec(query.limit(limit + 1))).all()
+            headers = {}
+            if len(careers) > limit:
+                careers = careers[:limit]
+                headers["X-Next-Cursor"] = encode_cursor(careers[-1].posted_at, careers[-1].id)
+
             logger.info(f"Retrieved {len(careers)} career posts")
-            return careers
+            return careers, headers
+
+    try:
+        cache_key = f"list:{category_id}:{limit}:{offset}:{cursor}"
+        return await cached_json_response(request, careers_cache, cache_key, load)
     except Exception as e:
         logger.error(f"Error fetching career posts: {str(e)}")
         raise HTTPException(
@@ -203,14 +319,15 @@ async def get_career_posts(
     dependencies=[Depends(RateLimiter(times=10, seconds=60))]
 )
 async def get_career_post(
+    request: Request,
     career_id: int,
     user: dict = Depends(get_current_user)
 ):
-    try:
-        with Session(engine) as session:
-            career = session.exec(
+    async def load():
+        async with async_session() as session:
+            career = (await session.exec(
                 select(CareerPost).where(CareerPost.id == career_id)
-            ).first()
+            )).first()
             
             if not career:
                 logger.warning(f"Career post not found: {career_id}")
@@ -220,7 +337,10 @@ async def get_career_post(
                 )
                 
             logger.info(f"Retrieved career post: {career_id}")
-            return career
+            return career, {}
+
+    try:
+        return await cached_json_response(request, careers_cache, f"post:{career_id}", load)
     except HTTPException:
         raise
     except Exception as e:
@@ -243,18 +363,21 @@ async def create_career_post(
     # user: dict = Depends(get_current_user)
 ):
     try:
-        with Session(engine) as session:
+        async with async_session() as session:
             career = CareerPost(
                 title=career_data.title,
                 description=career_data.description,
                 requirements=career_data.requirements,
+                requirement_keywords=extract_requirement_keywords(career_data.requirements),
                 location=career_data.location,
                 category_id=career_data.category_id if hasattr(career_data, 'category_id') else None,
                 posted_at=datetime.utcnow()
             )
             session.add(career)
-            session.commit()
-            session.refresh(career)
+            await session.commit()
+            await session.refresh(career)
+            await careers_cache.ainvalidate_all()
+            upsert_posting(career)
             
             logger.info(f"New career post created: {career.id} - {career.title}")
             
@@ -294,10 +417,10 @@ async def update_career_post(
     user: dict = Depends(get_current_user)
 ):
     try:
-        with Session(engine) as session:
-            career = session.exec(
+        async with async_session() as session:
+            career = (await session.exec(
                 select(CareerPost).where(CareerPost.id == career_id)
-            ).first()
+            )).first()
             
             if not career:
                 logger.warning(f"Career post not found: {career_id}")
@@ -313,16 +436,20 @@ async def update_career_post(
                 career.description = description
             if requirements is not None:
                 career.requirements = requirements
+                career.requirement_keywords = extract_requirement_keywords(requirements)
             if location is not None:
                 career.location = location
             if content is not None:
                 career.content = content
             if category_id is not None:
                 career.category_id = category_id
+            career.updated_at = datetime.utcnow()
                 
             session.add(career)
-            session.commit()
-            session.refresh(career)
+            await session.commit()
+            await session.refresh(career)
+            await careers_cache.ainvalidate_all()
+            upsert_posting(career)
             
             logger.info(f"Updated career post: {career_id}")
             return career
@@ -337,7 +464,6 @@ async def update_career_post(
 
 @app.post("/apply")
 async def apply_for_job(
-    background_tasks: BackgroundTasks,
     career_id: Annotated[int, Form()],
     full_name: Annotated[str, Form()],
     phone_number: Annotated[str, Form()],
@@ -347,21 +473,6 @@ async def apply_for_job(
     user: dict = Depends(get_current_user)
 ) -> JSONResponse:
     try:
-        # First check for existing application
-        with Session(engine) as session:
-            existing_application = session.exec(
-                select(Application)
-                .where(Application.career_id == career_id)
-                .where(Application.user_id == user['uid'])
-            ).first()
-            
-            if existing_application:
-                logger.warning(f"User {user['uid']} already applied to career {career_id}")
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="You have already applied for this position"
-                )
-
         # Validate file types
         allowed_extensions = ['.pdf', '.docx', '.doc']
         cv_filename = cv.filename.lower()
@@ -377,31 +488,36 @@ async def apply_for_job(
                 detail=f"Additional document must be one of {', '.join(allowed_extensions)}"
             )
 
+        # Push back before touching storage if screening is saturated
+        if settings.SCREENING_BACKEND == "inprocess":
+            ensure_screening_capacity()
+
+        # Verify career exists before touching storage
+        job = await get_job(career_id)
+        if not job:
+            logger.warning(f"Career post not found: {career_id}")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job posting not found"
+            )
+
         # Save uploaded files
-        cv_path = await save_uploaded_file(cv)
-        document_path = await save_uploaded_file(document) if document else None
+        # Unreferenced uploads (e.g. a duplicate below) are left to the GC
+        cv_file = await store_upload(cv)
+        document_file = await store_upload(document) if document else None
+        cv_path = cv_file.path
+        document_path = document_file.path if document_file else None
         logger.info(f"Saved files - CV: {cv_path}, Document: {document_path or 'None'}")
 
-        with Session(engine) as session:
-            # Verify career exists
-            job = session.exec(select(CareerPost).where(CareerPost.id == career_id)).first()
-            if not job:
-                logger.warning(f"Career post not found: {career_id}")
-                if os.path.exists(cv_path):
-                    os.remove(cv_path)
-                if document_path and os.path.exists(document_path):
-                    os.remove(document_path)
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Job posting not found"
-                )
-
-            # Create and commit application record first
+        async with async_session() as session:
+            # Application and blob references go in one transaction; duplicates
+            # are caught by uix_user_career rather than a pre-query
             application = Application(
                 full_name=full_name,
                 phone_number=phone_number,
                 email=email,
                 cv_path=cv_path,
+                cv_sha256=cv_file.sha256,
                 document_path=document_path,
                 career_id=career_id,
                 user_id=user['uid'],
@@ -409,72 +525,365 @@ async def apply_for_job(
             )
             
             session.add(application)
-            session.commit()
-            session.refresh(application)
+            try:
+                # Flush first so a duplicate apply fails here, not in the
+                # autoflush of the blob update below
+                await session.flush()
+                await session.execute(acquire_blobs(
+                    [cv_file, document_file] if document_file else [cv_file]
+                ))
+                await session.commit()
+            except IntegrityError as e:
+                await session.rollback()
+                if "uix_user_career" in str(e.orig):
+                    logger.warning(f"User {user['uid']} already applied to career {career_id}")
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="You have already applied for this position"
+                    )
+                # The posting was deleted after the cached lookup
+                logger.warning(f"Application insert failed for career {career_id}: {str(e.orig)}")
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Job posting not found"
+                )
             logger.info(f"New application created: {application.id}")
 
             # Prepare success response
-            response = JSONResponse(
+            content = {
+                "message": "Application submitted successfully",
+                "application_id": application.id,
+                "status": "pending"
+            }
+
+            # The CV is extracted by the screening stage, never on the request
+            if settings.SCREENING_BACKEND == "celery":
+                # Durable path: a Celery worker extracts and screens the CV
+                try:
+                    # Redis push and Celery publish are blocking calls
+                    await asyncio.to_thread(enqueue_application, application.id)
+                except Exception as queue_error:
+                    logger.error(f"Failed to queue screening for {application.id}: {str(queue_error)}")
+            else:
+                try:
+                    # Queue screening on the bounded in-process screening queue
+                    enqueue_screening(
+                        application.id,
+                        cv_path,
+                        cv_file.sha256,
+                        job.description,
+                        job.title,
+                        job.requirement_keywords or extract_requirement_keywords(job.requirements),
+                        job.requirements
+                    )
+                except asyncio.QueueFull:
+                    logger.error(f"Screening queue full, application {application.id} left pending")
+
+            # Only suggest roles for CVs we've already parsed; never parse inline
+            resume_text = await cached_extracted_text(cv_file.sha256)
+            if resume_text:
+                try:
+                    content["suggested_roles"] = await match_postings(
+                        session, resume_text, settings.MATCH_TOP_K, exclude_career_id=career_id
+                    )
+                except Exception as match_error:
+                    logger.error(f"Role suggestions failed: {str(match_error)}")
+
+            return JSONResponse(
                 status_code=status.HTTP_201_CREATED,
-                content={
-                    "message": "Application submitted successfully",
-                    "application_id": application.id,
-                    "status": "pending"
-                },
+                content=content,
                 headers={
                     "Access-Control-Allow-Origin": "http://localhost:3000",
                     "Access-Control-Allow-Credentials": "true"
                 }
             )
-
-            # Now kick off background tasks after response is ready
-            try:
-                # Extract text from resume in background
-                resume_text = await extract_text_from_file(cv_path)
-                logger.debug(f"Extracted resume text (length: {len(resume_text)})")
-                
-                # Add background screening task
-                background_tasks.add_task(
-                    process_application_screening,
-                    application.id,
-                    job.description,
-                    resume_text,
-                    job.title
-                )
-            except Exception as bg_error:
-                logger.error(f"Background task setup failed: {str(bg_error)}")
-                # This won't affect the response since it happens after
-
-            return response
             
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error processing application: {str(e)}", exc_info=True)
-        if 'cv_path' in locals() and cv_path and os.path.exists(cv_path):
-            os.remove(cv_path)
-        if 'document_path' in locals() and document_path and os.path.exists(document_path):
-            os.remove(document_path)
-            
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to process application"
         )
 
+@app.get(
+    "/careers/{career_id}/candidates",
+    response_model=List[CandidateSummary],
+    summary="Get the top scored candidates for a career post",
+    dependencies=[Depends(RateLimiter(times=10, seconds=60))]
+)
+async def get_top_candidates(
+    career_id: int,
+    limit: int = Query(default=10, ge=1, le=100),
+    user: dict = Depends(get_admin_user)
+):
+    try:
+        async with async_session() as session:
+            candidates = (await session.exec(
+                select(Application)
+                .where(Application.career_id == career_id)
+                .where(Application.match_score.is_not(None))
+                .order_by(Application.match_score.desc())
+                .limit(limit)
+            )).all()
+            logger.info(f"Retrieved {len(candidates)} top candidates for career {career_id}")
+            return candidates
+    except Exception as e:
+        logger.error(f"Error fetching top candidates: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve top candidates"
+        )
+
+@app.get(
+    "/careers/{career_id}/ranking",
+    summary="Rank all applicants for a career post against its description",
+    dependencies=[Depends(RateLimiter(times=10, seconds=60))]
+)
+async def get_career_ranking(
+    career_id: int,
+    top_k: int = Query(default=20, ge=1, le=500),
+    user: dict = Depends(get_admin_user)
+):
+    try:
+        async with async_session() as session:
+            career = (await session.exec(
+                select(CareerPost).where(CareerPost.id == career_id)
+            )).first()
+            if not career:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Career post not found"
+                )
+
+            ranked = await rank_applicants(session, career, top_k)
+            applications = {
+                application.id: application
+                for application in (await session.exec(
+                    select(Application).where(Application.id.in_([application_id for application_id, _ in ranked]))
+                )).all()
+            }
+
+        logger.info(f"Ranked {len(ranked)} applicants for career {career_id}")
+        return [
+            {
+                "application_id": application_id,
+                "score": round(score, 4),
+                "full_name": applications[application_id].full_name,
+                "status": applications[application_id].status,
+                "match_score": applications[application_id].match_score,
+            }
+            for application_id, score in ranked
+            if application_id in applications
+        ]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error ranking applicants: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to rank applicants"
+        )
+
+@app.get(
+    "/applications/{application_id}/matches",
+    summary="Suggest other open roles that fit an application's resume",
+    dependencies=[Depends(RateLimiter(times=10, seconds=60))]
+)
+async def get_application_matches(
+    application_id: int,
+    top_k: int = Query(default=5, ge=1, le=50),
+    user: dict = Depends(get_current_user)
+):
+    try:
+        async with async_session() as session:
+            application = (await session.exec(
+                select(Application)
+                .where(Application.id == application_id)
+                .where(Application.user_id == user['uid'])
+            )).first()
+            if not application:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Application not found"
+                )
+
+            stored = (await session.exec(
+                select(ApplicationAnalysis.resume_text)
+                .where(ApplicationAnalysis.application_id == application_id)
+            )).first()
+            resume_text = (
+                decompress_text(stored) if stored
+                else await extract_text_from_file(application.cv_path, application.cv_sha256)
+            )
+
+            matches = await match_postings(
+                session, resume_text, top_k, exclude_career_id=application.career_id
+            )
+            logger.info(f"Found {len(matches)} matching roles for application {application_id}")
+            return matches
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error matching roles: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to match roles"
+        )
+
+@app.post(
+    "/careers/{career_id}/rescreen",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue a career post's applications for rescreening",
+    dependencies=[Depends(RateLimiter(times=2, seconds=60))]
+)
+async def rescreen_career_applications(
+    career_id: int,
+    user: dict = Depends(get_admin_user)
+):
+    try:
+        async with async_session() as session:
+            career = (await session.exec(
+                select(CareerPost).where(CareerPost.id == career_id)
+            )).first()
+            if not career:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Career post not found"
+                )
+            applications = (await session.exec(
+                select(Application.id, Application.cv_path, Application.cv_sha256)
+                .where(Application.career_id == career_id)
+                .where(Application.status.in_(SCREENABLE_STATUSES))
+            )).all()
+
+        if settings.SCREENING_BACKEND == "celery":
+            await asyncio.to_thread(
+                enqueue_applications,
+                [application_id for application_id, _, _ in applications],
+                rescreen=True
+            )
+        else:
+            keywords = career.requirement_keywords or extract_requirement_keywords(career.requirements)
+            enqueue_screenings([
+                (
+                    application_id, cv_path, cv_sha256, career.description,
+                    career.title, keywords, career.requirements
+                )
+                for application_id, cv_path, cv_sha256 in applications
+            ])
+        logger.info(f"Queued {len(applications)} applications for rescreen on career {career_id}")
+        return {"message": "Rescreen queued", "queued": len(applications)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queueing rescreen: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to queue rescreen"
+        )
+
+@app.get(
+    "/screening/stats",
+    summary="Screening backlog and model call throttling",
+    dependencies=[Depends(RateLimiter(times=30, seconds=60))]
+)
+async def get_screening_stats(user: dict = Depends(get_admin_user)):
+    try:
+        lanes = await asyncio.to_thread(lane_depths)
+    except Exception as e:
+        logger.error(f"Error reading screening lanes: {str(e)}")
+        lanes = {}
+    return {
+        "queued": {"inprocess": screening_queue_depth(), **lanes},
+        "llm": limiter_stats()
+    }
+
+@app.get(
+    "/admin/profiles",
+    summary="List stored request profiles, newest first",
+    dependencies=[Depends(RateLimiter(times=30, seconds=60))]
+)
+async def get_profiles(user: dict = Depends(get_admin_user)):
+    return await asyncio.to_thread(list_profiles)
+
+@app.get(
+    "/admin/profiles/{name}",
+    summary="Download a request profile as collapsed stacks",
+    dependencies=[Depends(RateLimiter(times=30, seconds=60))]
+)
+async def get_profile(name: str, user: dict = Depends(get_admin_user)):
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return FileResponse(path, media_type="text/plain", filename=name)
+
+@app.get(
+    "/applications/stream",
+    summary="Server-sent events for status changes on the user's applications",
+    dependencies=[Depends(RateLimiter(times=10, seconds=60))]
+)
+async def stream_applications(request: Request, user: dict = Depends(get_current_user)):
+    async def events():
+        yield "retry: 5000\n\n"
+        async with event_hub.subscribe(user['uid']) as queue:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.SSE_HEARTBEAT)
+                    yield f"event: status\ndata: {event}\n\n"
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing an idle stream
+                    yield ": heartbeat\n\n"
+
+    logger.info(f"Status stream opened for user {user['uid']}")
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get(
     "/applications",
     response_model=List[Application],
     summary="Get user's applications",
     dependencies=[Depends(RateLimiter(times=10, seconds=60))]
 )
-async def get_applications(user: dict = Depends(get_current_user)):
+async def get_applications(
+    response: Response,
+    limit: Optional[int] = Query(default=None, ge=1, le=100),
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    user: dict = Depends(get_current_user)
+):
+    after = decode_cursor(cursor) if cursor else None
+    # Without limit or cursor the full list is returned, as clients expect
+    if limit is None and after:
+        limit = 100
     try:
-        with Session(engine) as session:
-            apps = session.exec(
+        async with async_session() as session:
+            query = (
                 select(Application)
                 .where(Application.user_id == user['uid'])
-                .order_by(Application.created_at.desc())
-            ).all()
+                .order_by(Application.created_at.desc(), Application.id.desc())
+            )
+
+            if after:
+                query = query.where(tuple_(Application.created_at, Application.id) < tuple_(*after))
+            else:
+                query = query.offset(offset)
+
+            if limit is None:
+                apps = (await session.exec(query)).all()
+            else:
+                apps = (await session.exec(query.limit(limit + 1))).all()
+            if limit is not None and len(apps) > limit:
+                apps = apps[:limit]
+                response.headers["X-Next-Cursor"] = encode_cursor(apps[-1].created_at, apps[-1].id)
+
             logger.info(f"Retrieved {len(apps)} applications for user {user['uid']}")
             return apps
     except Exception as e:
@@ -486,58 +895,108 @@ async def get_applications(user: dict = Depends(get_current_user)):
 
 async def process_application_screening(
     application_id: int,
+    cv_path: str,
+    cv_sha256: Optional[str],
     job_desc: str,
-    resume_text: str,
-    job_title: str
+    job_title: str,
+    requirement_keywords: Optional[List[str]] = None,
+    requirements: str = "",
+    attempt: int = 0
 ):
-    with Session(engine) as session:
+    async with async_session() as session:
         try:
-            application = session.exec(
+            application = (await session.exec(
                 select(Application)
                 .where(Application.id == application_id)
-            ).first()
+            )).first()
             
             if not application:
                 logger.warning(f"Application not found for screening: {application_id}")
                 return
+            if application.status not in SCREENABLE_STATUSES:
+                logger.info(f"Application {application_id} is {application.status.value}, not rescreening")
+                return
+            previous_status = application.status
 
             logger.info(f"Processing screening for application {application_id}")
-            
-            # AI Analysis
-            ai_analysis_str = analyze_resume(job_desc, resume_text)
-            logger.debug(f"AI analysis result: {ai_analysis_str}")
-            
-            # Clean the JSON string by removing Markdown code block markers
-            if ai_analysis_str.startswith("```json") and ai_analysis_str.endswith("```"):
-                ai_analysis_str = ai_analysis_str[7:-3].strip()  # Remove ```json and ```
-            
-            # Parse the JSON string to a dictionary
-            import json
-            ai_analysis = json.loads(ai_analysis_str)
-            
-            # Update application based on score
-            if ai_analysis.get("match_score", 0) < 50:
-                application.status = ApplicationStatus.rejected
-                logger.info(f"Application {application_id} rejected (low score)")
+
+            # End the read transaction so the pooled connection isn't held
+            # while the CV is parsed or the model is called
+            await session.commit()
+
+            try:
+                with stage("extract"):
+                    resume_text = await extract_text_from_file(cv_path, cv_sha256)
+                logger.debug(f"Extracted resume text (length: {len(resume_text)})")
+            except HTTPException as e:
+                await mark_screening_failed(session, application, f"extraction failed: {e.detail}")
+                return
+
+            # Cheap deterministic pre-screen; only ambiguous resumes reach the model
+            with stage("prescreen"):
+                ai_analysis = prescreen(requirement_keywords or [], resume_text)
+            if ai_analysis:
+                logger.info(f"Application {application_id} decided by pre-screen")
             else:
-                application.status = ApplicationStatus.viewed
-                logger.info(f"Application {application_id} marked as viewed")
+                try:
+                    ai_analysis_str = await analyze_resume_async(job_desc, resume_text, job_title, requirements)
+                except ValueError as e:
+                    # Raised only after the repair retry failed too; the raw reply is logged there
+                    await mark_screening_failed(session, application, f"unusable AI analysis: {str(e)}")
+                    return
+                except Exception as e:
+                    # Model errors that outlived call_llm's retries (quota, outage) are
+                    # retried later under the same attempt cap as the Celery path
+                    if attempt + 1 >= settings.SCREENING_MAX_ATTEMPTS:
+                        await mark_screening_failed(
+                            session, application, f"AI analysis failed after {attempt + 1} attempts: {str(e)}"
+                        )
+                        return
+                    delay = settings.SCREENING_RETRY_DELAY * (attempt + 1)
+                    logger.warning(f"AI analysis failed for application {application_id}, retrying in {delay}s: {str(e)}")
+                    retry_screening(
+                        delay, application_id, cv_path, cv_sha256, job_desc, job_title,
+                        requirement_keywords, requirements, attempt + 1
+                    )
+                    return
+                logger.debug(f"AI analysis result: {ai_analysis_str}")
+
+                # Already validated (and repaired if needed) by analyze_resume
+                ai_analysis = parse_analysis(ai_analysis_str)
+
+            # Update application based on score
+            application.status = status_for_analysis(ai_analysis)
+            application.match_score = match_score_of(ai_analysis)
+            logger.info(f"Application {application_id} marked as {application.status.value}")
             
             application.updated_at = datetime.utcnow()
-            session.add(application)
-            session.commit()
+            with stage("commit"):
+                session.add(application)
+                await session.execute(upsert_analyses([analysis_record(
+                    application_id, ai_analysis, resume_text, PROMPT_VERSION, model_name()
+                )]))
+                await session.commit()
+            await event_hub.publish(application)
             
-            # Send status email
-            if settings.SENDGRID_API_KEY:
-                send_status_email.delay(
+            # Send status email; rescreens that keep their status don't re-notify
+            if settings.SENDGRID_API_KEY and application.status != previous_status:
+                await asyncio.to_thread(
+                    queue_status_email,
                     application.email,
                     application.status.value,
                     job_title
                 )
                 logger.info(f"Status email queued for {application.email}")
             
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse AI analysis JSON: {str(e)}")
-            logger.error(f"Raw analysis content: {ai_analysis_str}")
         except Exception as e:
-            logger.error(f"Error in background screening: {str(e)}")
\ No newline at end of file
+            logger.error(f"Error in background screening: {str(e)}")
+
+
+async def mark_screening_failed(session: AsyncSession, application: Application, reason: str) -> None:
+    """Move an application out of pending when it can't be screened"""
+    logger.error(f"Screening failed for application {application.id}: {reason}")
+    application.status = ApplicationStatus.error
+    application.updated_at = datetime.utcnow()
+    session.add(application)
+    await session.commit()
+    await event_hub.publish(application)
@@ -0,0 +1,28 @@
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from conf.config import settings
+from services.metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool
+
+_pool_options = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE
+)
+
+# Synchronous engine for the Celery workers
+engine = create_engine(settings.DATABASE_URL, poolclass=TimedQueuePool, **_pool_options)
+
+# asyncpg engine for the API so queries never block the event loop
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    poolclass=TimedAsyncAdaptedQueuePool,
+    **_pool_options
+)
+
+async_session = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
@@ -1,6 +1,6 @@
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import JSON, Column, Index, LargeBinary, UniqueConstraint
 from sqlmodel import SQLModel, Field, Relationship
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -10,6 +10,7 @@ class ApplicationStatus(str, Enum):
     viewed = "viewed"
     accepted = "accepted"
     rejected = "rejected"
+    error = "error"  # Screening could not complete (unreadable CV, unusable analysis)
 
 
 class User(SQLModel, table=True):
@@ -34,12 +35,20 @@ class CareerPost(SQLModel, table=True):
     requirements: str
     location: str
     content: str = Field(default="")
+    requirement_keywords: Optional[List[str]] = Field(default=None, sa_column=Column(JSON))  # Pre-screen keywords
     posted_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
     category_id: Optional[int] = Field(default=None, foreign_key="careercategory.id")
 
     category: Optional[CareerCategory] = Relationship(back_populates="careers")
     applications: List["Application"] = Relationship(back_populates="career")
 
+    # Match the job board's filter and keyset sort order
+    __table_args__ = (
+        Index('ix_careerpost_posted', 'posted_at', 'id'),
+        Index('ix_careerpost_category_posted', 'category_id', 'posted_at', 'id'),
+    )
+
 
 class Application(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -47,8 +56,10 @@ class Application(SQLModel, table=True):
     phone_number: str
     email: str
     cv_path: str
+    cv_sha256: Optional[str] = Field(default=None, index=True)
     document_path: Optional[str] = Field(default=None) 
     status: ApplicationStatus = Field(default=ApplicationStatus.pending)
+    match_score: Optional[int] = Field(default=None, index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -60,4 +71,28 @@ class Application(SQLModel, table=True):
     # Add composite unique constraint
     __table_args__ = (
         UniqueConstraint('user_id', 'career_id', name='uix_user_career'),
+        # Serves "top N candidates for job X"
+        Index('ix_application_career_score', 'career_id', 'match_score'),
+        # Serves a user's applications, newest first
+        Index('ix_application_user_created', 'user_id', 'created_at', 'id'),
     )
+
+
+class ApplicationAnalysis(SQLModel, table=True):
+    """Full AI analysis and extracted resume text, kept out of Application
+    so list endpoints don't drag the large payloads along"""
+    application_id: int = Field(foreign_key="application.id", primary_key=True)
+    analysis: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    resume_text: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))  # zlib-compressed
+    prompt_version: Optional[str] = Field(default=None)
+    model_name: Optional[str] = Field(default=None)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class FileBlob(SQLModel, table=True):
+    """Content-addressed upload shared by every application that sent it"""
+    sha256: str = Field(primary_key=True)
+    path: str
+    size: int
+    ref_count: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,18 +1,161 @@
-import firebase_admin
-from firebase_admin import credentials, auth
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+import jwt
+import requests
+from cachetools import TLRUCache
+from cryptography.x509 import load_pem_x509_certificate
 from fastapi import HTTPException, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from conf.config import settings
 
-cred = credentials.Certificate("serviceAccountKey.json")
-firebase_admin.initialize_app(cred)
+logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
+GOOGLE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+
+
+def fetch_google_certs() -> Tuple[Dict[str, str], int]:
+    """Fetch Firebase's signing certs and how long Google says to keep them"""
+    response = requests.get(GOOGLE_CERTS_URL, timeout=5)
+    response.raise_for_status()
+    match = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+    return response.json(), int(match.group(1)) if match else 3600
+
+
+class PublicKeyCache:
+    """kid -> public key map, refreshed when max-age lapses or an unknown kid
+    shows up (at most once per MIN_REFRESH_INTERVAL)"""
+
+    MIN_REFRESH_INTERVAL = 60
+
+    def __init__(self, fetcher: Callable[[], Tuple[Dict[str, str], int]] = fetch_google_certs):
+        self._fetcher = fetcher
+        self._keys: Dict[str, Any] = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        certs, max_age = self._fetcher()
+        self._keys = {
+            kid: load_pem_x509_certificate(pem.encode("utf-8")).public_key()
+            for kid, pem in certs.items()
+        }
+        self._fetched_at = time.time()
+        self._expires_at = self._fetched_at + max_age
+        logger.info(f"Loaded {len(self._keys)} token signing keys (max-age {max_age}s)")
+
+    def get(self, kid: str) -> Any:
+        with self._lock:
+            now = time.time()
+            stale = now >= self._expires_at
+            unknown = kid not in self._keys and now - self._fetched_at >= self.MIN_REFRESH_INTERVAL
+            if stale or unknown:
+                self._refresh()
+            key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return key
+
+
+class FirebaseTokenVerifier:
+    """Verifies Firebase ID tokens locally and remembers verified ones.
+
+    Verified claims are cached by token hash until the earlier of the token's
+    exp and token_ttl, so repeat callers skip signature checks entirely.
+    """
+
+    def __init__(
+        self,
+        project_id: str,
+        keys: Optional[PublicKeyCache] = None,
+        cache_size: int = 10000,
+        token_ttl: int = 300
+    ):
+        self.project_id = project_id
+        self.issuer = f"https://securetoken.google.com/{project_id}"
+        self._keys = keys or PublicKeyCache()
+        self._token_ttl = token_ttl
+        self._tokens: TLRUCache = TLRUCache(
+            maxsize=cache_size,
+            ttu=lambda _key, claims, now: min(claims["exp"], now + self._token_ttl),
+            timer=time.time
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _token_key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def cached(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._tokens.get(self._token_key(token))
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        cached = self.cached(token)
+        if cached is not None:
+            return cached
+
+        header = jwt.get_unverified_header(token)
+        if header.get("alg") != "RS256" or not header.get("kid"):
+            raise jwt.InvalidTokenError("Unexpected token header")
+
+        claims = jwt.decode(
+            token,
+            self._keys.get(header["kid"]),
+            algorithms=["RS256"],
+            audience=self.project_id,
+            issuer=self.issuer,
+            options={"require": ["exp", "iat", "aud", "iss", "sub"]}
+        )
+        if not claims.get("sub") or len(claims["sub"]) > 128:
+            raise jwt.InvalidTokenError("Invalid subject")
+        if claims.get("auth_time", 0) > time.time():
+            raise jwt.InvalidTokenError("auth_time is in the future")
+        claims["uid"] = claims["sub"]
+
+        with self._lock:
+            self._tokens[self._token_key(token)] = claims
+        return claims
+
+    async def verify_async(self, token: str) -> Dict[str, Any]:
+        """Cache hits return inline; misses verify on a worker thread"""
+        cached = self.cached(token)
+        if cached is not None:
+            return cached
+        return await asyncio.to_thread(self.verify, token)
+
+
+def firebase_project_id() -> str:
+    """FIREBASE_PROJECT_ID, else the project of the service account key"""
+    if settings.FIREBASE_PROJECT_ID:
+        return settings.FIREBASE_PROJECT_ID
+    with open(settings.FIREBASE_KEY_PATH) as f:
+        return json.load(f)["project_id"]
+
+
+@lru_cache(maxsize=1)
+def get_token_verifier() -> FirebaseTokenVerifier:
+    # Built on first use so importing this module needs no credentials
+    return FirebaseTokenVerifier(
+        firebase_project_id(),
+        cache_size=settings.AUTH_TOKEN_CACHE_SIZE,
+        token_ttl=settings.AUTH_TOKEN_CACHE_TTL
+    )
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         token = credentials.credentials
-        decoded_token = auth.verify_id_token(token)
-        
+        decoded_token = await get_token_verifier().verify_async(token)
+
         # Verify the token is from Google Sign-In
         provider = decoded_token.get('firebase', {}).get('sign_in_provider')
         if provider != 'google.com':
@@ -20,11 +163,20 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
                 status_code=403,
                 detail="Only Google Sign-In is allowed"
             )
-            
+
         return decoded_token
-    except auth.InvalidIdTokenError:
-        raise HTTPException(status_code=403, detail="Invalid authentication token")
-    except auth.ExpiredIdTokenError:
+    except HTTPException:
+        raise
+    except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=403, detail="Expired authentication token")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=403, detail="Invalid authentication token")
     except Exception as e:
-        raise HTTPException(status_code=403, detail="Authentication failed")
\ No newline at end of file
+        logger.error(f"Token verification failed: {str(e)}")
+        raise HTTPException(status_code=403, detail="Authentication failed")
+
+
+async def get_admin_user(user: dict = Depends(get_current_user)):
+    if user["uid"] not in settings.ADMIN_UIDS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
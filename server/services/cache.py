@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import redis
+from cachetools import TTLCache
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TwoTierCache:
+    """String cache with an in-process LRU tier in front of Redis.
+
+    Redis errors are logged and treated as misses so a cache outage never
+    fails the request it was meant to speed up.
+
+    invalidate_all() bumps a generation counter in Redis that is folded into
+    every key, so other processes drop their entries within
+    GENERATION_REFRESH seconds without any fan-out.
+    """
+
+    GENERATION_REFRESH = 1.0
+
+    _instances: "weakref.WeakSet[TwoTierCache]" = weakref.WeakSet()
+
+    def __init__(self, namespace: str, maxsize: int, ttl: int):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._local: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._redis = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self._generation = 0
+        self._generation_checked = 0.0
+        TwoTierCache._instances.add(self)
+
+    @classmethod
+    def instances(cls) -> List["TwoTierCache"]:
+        """Every live cache, for metrics"""
+        return list(cls._instances)
+
+    @property
+    def _generation_key(self) -> str:
+        return f"{self.namespace}:generation"
+
+    def _current_generation(self) -> int:
+        now = time.monotonic()
+        if now - self._generation_checked > self.GENERATION_REFRESH:
+            try:
+                self._generation = int(self._redis.get(self._generation_key) or 0)
+            except redis.RedisError as e:
+                logger.warning(f"Cache generation read failed for {self.namespace}: {str(e)}")
+            self._generation_checked = now
+        return self._generation
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[str]:
+        key = f"{self._current_generation()}:{key}"
+        with self._lock:
+            value = self._local.get(key)
+            if value is not None:
+                self.memory_hits += 1
+                return value
+
+        try:
+            value = self._redis.get(self._redis_key(key))
+        except redis.RedisError as e:
+            logger.warning(f"Cache read failed for {self.namespace}: {str(e)}")
+            value = None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.redis_hits += 1
+            self._local[key] = value
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        key = f"{self._current_generation()}:{key}"
+        with self._lock:
+            self._local[key] = value
+        try:
+            self._redis.set(self._redis_key(key), value, ex=self.ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Cache write failed for {self.namespace}: {str(e)}")
+
+    def invalidate_all(self) -> None:
+        """Drop every entry in this namespace, locally and for other processes"""
+        with self._lock:
+            self._local.clear()
+        try:
+            self._generation = int(self._redis.incr(self._generation_key))
+        except redis.RedisError as e:
+            logger.warning(f"Cache invalidation failed for {self.namespace}: {str(e)}")
+            self._generation += 1
+        self._generation_checked = time.monotonic()
+
+    async def aget(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    async def ainvalidate_all(self) -> None:
+        await asyncio.to_thread(self.invalidate_all)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.memory_hits + self.redis_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.memory_hits + self.redis_hits) / lookups if lookups else 0.0,
+            }
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+async def cached_json_response(
+    request: Request,
+    cache: TwoTierCache,
+    key: str,
+    loader: Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]]
+) -> Response:
+    """Serve a JSON body from cache (or loader on miss) with an ETag.
+
+    loader returns (data, extra_headers); both are cached together. A
+    matching If-None-Match gets a bodiless 304.
+    """
+    value = await cache.aget(key)
+    if value is None:
+        data, headers = await loader()
+        body = json.dumps(jsonable_encoder(data), separators=(",", ":"))
+        etag = f'"{hashlib.sha1(body.encode("utf-8")).hexdigest()}"'
+        value = json.dumps({"etag": etag, "headers": headers, "body": body})
+        await cache.aset(key, value)
+
+    entry = json.loads(value)
+    headers = {**entry["headers"], "ETag": entry["etag"], "Cache-Control": "no-cache"}
+    if _etag_matches(request, entry["etag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, Optional, Set
+import redis
+from redis import asyncio as aioredis
+from conf.config import settings
+from models.model import Application
+
+logger = logging.getLogger(__name__)
+
+# Application status changes are published to applications:<user_id>. Each
+# API process holds one pattern subscription and fans events out to its own
+# SSE connections, so Redis sees one subscriber per process, not per client.
+CHANNEL_PREFIX = "applications:"
+
+
+def status_event(application: Application) -> str:
+    return json.dumps({
+        "application_id": application.id,
+        "career_id": application.career_id,
+        "status": application.status.value,
+        "match_score": application.match_score,
+        "updated_at": (application.updated_at or datetime.utcnow()).isoformat(),
+    })
+
+
+_redis = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+def publish_status_changes(applications: Iterable[Application]) -> None:
+    """Publish from synchronous code (Celery workers); failures are logged"""
+    try:
+        pipe = _redis.pipeline(transaction=False)
+        for application in applications:
+            pipe.publish(f"{CHANNEL_PREFIX}{application.user_id}", status_event(application))
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Status event publish failed: {str(e)}")
+
+
+class ApplicationEventHub:
+    """Per-process fan-out from the Redis pattern subscription to SSE clients"""
+
+    QUEUE_SIZE = 100
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._redis: Optional[aioredis.Redis] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def _client(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+        return self._redis
+
+    async def publish(self, application: Application) -> None:
+        try:
+            await self._client().publish(f"{CHANNEL_PREFIX}{application.user_id}", status_event(application))
+        except redis.RedisError as e:
+            logger.warning(f"Status event publish failed: {str(e)}")
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._client().pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    user_id = message["channel"][len(CHANNEL_PREFIX):]
+                    for queue in self._subscribers.get(user_id, ()):
+                        try:
+                            queue.put_nowait(message["data"])
+                        except asyncio.QueueFull:
+                            # A stalled client only loses its own events
+                            pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Status event subscription lost, reconnecting: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Queue receiving this user's events while the context is open"""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen(), name="application-events")
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        self._subscribers[user_id].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[user_id].discard(queue)
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+event_hub = ApplicationEventHub()
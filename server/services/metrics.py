@@ -0,0 +1,185 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Prometheus metrics. Everything on the hot path is a plain counter or
+# histogram observation; aggregate stats the modules already keep (cache
+# hits, parse outcomes, limiter state) are read only when /metrics is
+# scraped, by StatsCollector.
+#
+# With PROMETHEUS_MULTIPROC_DIR set (several API workers, Celery workers on
+# the same host) every process writes to that directory and /metrics
+# aggregates them.
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route", "status"]
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["engine"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+UPLOAD_BYTES = Histogram(
+    "upload_bytes",
+    "Size of stored uploads",
+    buckets=(16e3, 64e3, 256e3, 512e3, 1e6, 2e6, 5e6)
+)
+UPLOAD_DURATION = Histogram("upload_duration_seconds", "Time to stream an upload into storage")
+SCREENING_STAGE = Histogram(
+    "screening_stage_seconds",
+    "Time per screening stage",
+    ["stage"],  # extract, prescreen, llm, parse, commit
+    buckets=(0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+)
+EMAIL_SENDS = Counter("email_sends_total", "Status email send attempts by outcome", ["outcome"])
+EMAIL_RECIPIENTS = Counter("email_recipients_total", "Recipients in successful status email sends")
+
+
+@contextmanager
+def timed(histogram: Histogram, *labels: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        (histogram.labels(*labels) if labels else histogram).observe(time.perf_counter() - started)
+
+
+def stage(name: str):
+    """with stage("llm"): ... records into screening_stage_seconds"""
+    return timed(SCREENING_STAGE, name)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited"""
+
+    engine_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.labels(self.engine_label).observe(time.perf_counter() - started)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.labels(self.engine_label).observe(time.perf_counter() - started)
+
+
+class StatsCollector:
+    """Exports stats kept elsewhere at scrape time, at no per-call cost"""
+
+    def collect(self):
+        # Imported here: these modules import this one for their own metrics
+        from models.database import async_engine, engine
+        from services.cache import TwoTierCache
+        from llm.compaction import compaction_stats
+        from llm.parsing import parse_stats
+        from llm.ratelimit import limiter_stats
+
+        pool_in_use = GaugeMetricFamily("db_pool_connections", "Pooled connections", labels=["engine", "state"])
+        for label, pool in (("sync", engine.pool), ("async", async_engine.pool)):
+            pool_in_use.add_metric([label, "checked_out"], pool.checkedout())
+            pool_in_use.add_metric([label, "idle"], pool.checkedin())
+            pool_in_use.add_metric([label, "overflow"], max(0, pool.overflow()))
+        yield pool_in_use
+
+        lookups = CounterMetricFamily("cache_lookups", "Two-tier cache lookups", labels=["cache", "result"])
+        hit_ratio = GaugeMetricFamily("cache_hit_ratio", "Two-tier cache hit ratio", labels=["cache"])
+        for cache in TwoTierCache.instances():
+            stats = cache.stats()
+            lookups.add_metric([cache.namespace, "memory_hit"], stats["memory_hits"])
+            lookups.add_metric([cache.namespace, "redis_hit"], stats["redis_hits"])
+            lookups.add_metric([cache.namespace, "miss"], stats["misses"])
+            hit_ratio.add_metric([cache.namespace], stats["hit_ratio"])
+        yield lookups
+        yield hit_ratio
+
+        parses = CounterMetricFamily("llm_replies", "Model replies by parse outcome", labels=["outcome"])
+        for outcome, count in parse_stats().items():
+            parses.add_metric([outcome], count)
+        yield parses
+
+        compaction = compaction_stats()
+        yield CounterMetricFamily("prompt_tokens_saved", "Estimated tokens removed by compaction", value=compaction["tokens_saved"])
+
+        limiter = limiter_stats()
+        yield CounterMetricFamily("llm_calls", "Model calls admitted by the limiter", value=limiter["calls"])
+        yield CounterMetricFamily("llm_throttled", "Model calls rejected with 429", value=limiter["throttled"])
+        yield CounterMetricFamily("llm_retries", "Model call retries", value=limiter["retries"])
+        yield CounterMetricFamily("llm_wait_seconds", "Time spent waiting for rate limit and concurrency", value=limiter["wait_seconds"])
+        limits = GaugeMetricFamily("llm_concurrency", "Adaptive concurrency state", labels=["state"])
+        for state in ("waiting", "in_flight", "concurrency_limit"):
+            limits.add_metric([state], limiter[state])
+        yield limits
+
+
+REGISTRY.register(StatsCollector())
+
+
+def render_metrics() -> bytes:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        # Scrape-time stats come from the process serving /metrics
+        registry.register(StatsCollector())
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request under its route template.
+
+    Plain ASGI rather than BaseHTTPMiddleware, so there is no extra task per
+    request and streaming responses pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Route templates keep label cardinality bounded
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status_code)
+            ).observe(time.perf_counter() - started)
+
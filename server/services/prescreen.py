@@ -0,0 +1,70 @@
+import re
+from typing import Any, Dict, FrozenSet, List, Optional
+from conf.config import settings
+
+# Cheap deterministic screening that runs before the LLM. Requirements are
+# reduced to a keyword list when a posting is saved; at screening time the
+# resume is tokenized once into a set and coverage is a single set
+# intersection. Only the ambiguous middle band is sent to the model.
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+STOPWORDS = frozenset("""
+    a about above after all also an and any are as at be been being both but by can
+    could do does etc for from good great has have having how if in including into
+    is it its just least like more most must need needs nice not of on or other
+    our over plus preferred preferably related required requirements should so
+    some strong such than that the their them then there these this those through
+    to under understanding up using very was we well were what when where which
+    while who will with within work working would years year you your ability
+    able candidate candidates knowledge experience experienced familiarity
+    familiar proficiency proficient skills skill solid excellent hands team
+    degree equivalent field bachelor bachelors master masters minimum
+""".split())
+
+MAX_KEYWORDS = 40
+
+
+def tokenize(text: str) -> FrozenSet[str]:
+    return frozenset(TOKEN_PATTERN.findall(text.lower()))
+
+
+def extract_requirement_keywords(requirements: str) -> List[str]:
+    """Distinct, order-preserving keywords from a posting's requirements"""
+    keywords: List[str] = []
+    seen = set()
+    for token in TOKEN_PATTERN.findall(requirements.lower()):
+        if token in STOPWORDS or token in seen or token.rstrip("+").isdigit():
+            continue
+        if len(token) < 2 and token not in {"c", "r"}:
+            continue
+        seen.add(token)
+        keywords.append(token)
+        if len(keywords) >= MAX_KEYWORDS:
+            break
+    return keywords
+
+
+def prescreen(keywords: List[str], resume_text: str) -> Optional[Dict[str, Any]]:
+    """Return an auto-decided analysis for clear rejects/passes, else None"""
+    if not settings.PRESCREEN_ENABLED or not keywords:
+        return None
+
+    resume_tokens = tokenize(resume_text)
+    matched = [keyword for keyword in keywords if keyword in resume_tokens]
+    coverage = len(matched) / len(keywords)
+
+    if coverage < settings.PRESCREEN_REJECT_BELOW:
+        decision = "rejected"
+    elif coverage >= settings.PRESCREEN_PASS_ABOVE:
+        decision = "viewed"
+    else:
+        return None
+
+    return {
+        "source": "prescreen",
+        "decision": decision,
+        "match_score": round(coverage * 100),
+        "matched_keywords": matched,
+        "missing_keywords": [keyword for keyword in keywords if keyword not in resume_tokens],
+    }
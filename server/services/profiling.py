@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Any, Dict, List, Optional
+from conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+# On-demand request profiling. A request is profiled when profiling is
+# enabled and it either carries a valid signed X-Profile header or wins the
+# sampling draw. Selected requests get a sampler thread that walks
+# sys._current_frames() every PROFILING_INTERVAL seconds and keeps only the
+# stacks belonging to that request; the result is written as collapsed
+# stacks (flamegraph.pl / speedscope input) under PROFILING_DIR. Profiles
+# show where the request spends event-loop time; time spent awaiting I/O or
+# on worker threads doesn't appear. Unselected requests pay one settings check.
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_NAME = re.compile(r"^[\w.-]+\.collapsed$")
+
+
+def sign_profile_request(path: str, timestamp: Optional[int] = None) -> str:
+    """X-Profile header value for path, valid for PROFILING_SIGNATURE_TTL"""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(
+        settings.PROFILING_SECRET.encode("utf-8"),
+        f"{timestamp}:{path}".encode("utf-8"),
+        hashlib.sha256
+    ).hexdigest()
+    return f"{timestamp}:{digest}"
+
+
+def _valid_signature(value: str, path: str) -> bool:
+    if not settings.PROFILING_SECRET:
+        return False
+    timestamp = value.partition(":")[0]
+    if not timestamp.isdigit() or abs(time.time() - int(timestamp)) > settings.PROFILING_SIGNATURE_TTL:
+        return False
+    return hmac.compare_digest(sign_profile_request(path, int(timestamp)), value)
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class RequestSampler:
+    """Samples one thread's stacks, keeping those running under root"""
+
+    def __init__(self, thread_id: int, root: FrameType, interval: float):
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            if frame is self.root:
+                # Only stacks under the request's own frame belong to it; the
+                # event loop thread also runs other requests in between
+                stack.reverse()
+                self.samples[";".join(stack) or _frame_label(self.root)] += 1
+                return
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+
+def _write_profile(name: str, samples: Counter) -> None:
+    directory = Path(settings.PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    lines = [f"{stack} {count}" for stack, count in samples.most_common()]
+    (directory / name).write_text("\n".join(lines) + "\n")
+
+    # Keep only the newest PROFILING_MAX_FILES profiles
+    profiles = sorted(directory.glob("*.collapsed"), key=lambda path: path.stat().st_mtime)
+    for stale in profiles[:-settings.PROFILING_MAX_FILES]:
+        stale.unlink(missing_ok=True)
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    directory = Path(settings.PROFILING_DIR)
+    if not directory.is_dir():
+        return []
+    profiles = sorted(directory.glob("*.collapsed"), key=lambda path: path.stat().st_mtime, reverse=True)
+    return [
+        {
+            "name": path.name,
+            "size": path.stat().st_size,
+            "created_at": datetime.utcfromtimestamp(path.stat().st_mtime).isoformat(),
+        }
+        for path in profiles
+    ]
+
+
+def profile_path(name: str) -> Optional[Path]:
+    """Path of a stored profile, or None for unknown or unsafe names"""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = Path(settings.PROFILING_DIR) / name
+    return path if path.is_file() else None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware running RequestSampler on selected requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _selected(self, scope) -> bool:
+        if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            return True
+        for key, value in scope["headers"]:
+            if key == PROFILE_HEADER:
+                return _valid_signature(value.decode("latin-1"), scope["path"])
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if not settings.PROFILING_ENABLED or scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = RequestSampler(threading.get_ident(), sys._getframe(), settings.PROFILING_INTERVAL)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            samples = sampler.stop()
+            elapsed_ms = round((time.perf_counter() - started) * 1000)
+            slug = re.sub(r"[^\w]+", "_", scope["path"]).strip("_") or "root"
+            name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{scope['method']}-{slug[:60]}-{elapsed_ms}ms.collapsed"
+            if samples:
+                await asyncio.to_thread(_write_profile, name, samples)
+                logger.info(f"Profiled {scope['method']} {scope['path']} ({elapsed_ms}ms): {name}")
@@ -0,0 +1,207 @@
+import asyncio
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from cachetools import LRUCache
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from conf.config import settings
+from models.model import Application, ApplicationAnalysis, CareerPost
+from services.prescreen import TOKEN_PATTERN
+from services.utils import decompress_text
+
+# Local applicant ranking: every resume is hashed into a fixed-width
+# term-frequency row (the "hashing trick"), and ranking is TF-IDF cosine
+# similarity against the posting, computed as one matrix-vector product.
+
+
+def hash_features(text: str, dim: int) -> np.ndarray:
+    """Sublinear term frequencies of text, hashed into dim buckets"""
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    if not tokens:
+        return np.zeros(dim, dtype=np.float32)
+    # crc32 is stable across processes, unlike hash()
+    buckets = np.fromiter((zlib.crc32(token.encode()) for token in tokens), dtype=np.uint32, count=len(tokens))
+    counts = np.bincount(buckets % dim, minlength=dim).astype(np.float32)
+    return np.log1p(counts)
+
+
+class RankingIndex:
+    """Hashed TF matrix over one posting's applicants, grown in place"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.matrix = np.zeros((64, dim), dtype=np.float32)
+        self.doc_freq = np.zeros(dim, dtype=np.float32)
+        self.rows: Dict[int, int] = {}  # application_id -> row
+        self.application_ids: List[int] = []
+        self.watermark = datetime.min
+        self.stamps: Dict[int, datetime] = {}  # application_id -> updated_at indexed
+        self._lock: Optional[asyncio.Lock] = None
+        self._version = 0
+        self._norms: Tuple[int, np.ndarray] = (-1, np.zeros(0, dtype=np.float32))
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # Created on first use inside the serving loop: on Python 3.9 a lock
+        # built at import time binds to a different loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def __len__(self) -> int:
+        return len(self.application_ids)
+
+    def add(self, application_id: int, text: str) -> None:
+        features = hash_features(text, self.dim)
+        row = self.rows.get(application_id)
+        if row is None:
+            row = len(self.application_ids)
+            if row == self.matrix.shape[0]:
+                self.matrix = np.vstack([self.matrix, np.zeros_like(self.matrix)])
+            self.rows[application_id] = row
+            self.application_ids.append(application_id)
+        else:
+            # Rescreened: retract the old row's document frequencies
+            self.doc_freq -= self.matrix[row] > 0
+        self.matrix[row] = features
+        self.doc_freq += features > 0
+        self._version += 1
+
+    def rank(self, query: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        n = len(self.application_ids)
+        if n == 0:
+            return []
+        matrix = self.matrix[:n]
+        idf = np.log((1 + n) / (1 + self.doc_freq)) + 1
+        idf_sq = idf * idf
+
+        # cos(M*idf, q*idf) = M @ (q*idf^2) / (|M*idf| |q*idf|); row norms
+        # only change when the index does, so they are cached per version
+        version, norms = self._norms
+        if version != self._version:
+            norms = np.sqrt(np.square(matrix) @ idf_sq)
+            norms[norms == 0] = 1
+            self._norms = (self._version, norms)
+        q_norm = float(np.sqrt(np.square(query) @ idf_sq)) or 1.0
+        scores = (matrix @ (query * idf_sq)) / (norms * q_norm)
+
+        k = min(top_k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.application_ids[i], float(scores[i])) for i in top]
+
+
+def _refresh_since(index: RankingIndex) -> datetime:
+    """Lower bound for the next refresh query.
+
+    updated_at is stamped before commit, so a row can become visible after
+    the watermark has moved past it; re-scanning an overlap window picks up
+    such late commits.
+    """
+    overlap = timedelta(seconds=settings.RANKING_REFRESH_OVERLAP)
+    return index.watermark - overlap if index.watermark - datetime.min > overlap else datetime.min
+
+
+# Bounded by matrix bytes, so a long tail of postings (or a few very large
+# ones) can't pin memory indefinitely
+_indexes: LRUCache = LRUCache(
+    maxsize=settings.RANKING_CACHE_MB * 2 ** 20,
+    getsizeof=lambda index: index.matrix.nbytes
+)
+
+
+def _index_rows(index: RankingIndex, rows: List[Tuple[int, bytes, datetime]]) -> None:
+    for application_id, resume_text, updated_at in rows:
+        # Rows re-read from the overlap window are skipped unless they changed
+        if index.stamps.get(application_id) != updated_at:
+            index.add(application_id, decompress_text(resume_text))
+            index.stamps[application_id] = updated_at
+        index.watermark = max(index.watermark, updated_at)
+
+
+async def _refresh(session: AsyncSession, career_id: int, index: RankingIndex) -> None:
+    """Pull analyses stored since the last refresh into the index"""
+    rows = (await session.exec(
+        select(ApplicationAnalysis.application_id, ApplicationAnalysis.resume_text, ApplicationAnalysis.updated_at)
+        .join(Application, Application.id == ApplicationAnalysis.application_id)
+        .where(Application.career_id == career_id)
+        .where(ApplicationAnalysis.resume_text.is_not(None))
+        .where(ApplicationAnalysis.updated_at >= _refresh_since(index))
+        .order_by(ApplicationAnalysis.updated_at)
+    )).all()
+    if rows:
+        # A cold index decompresses and hashes every resume; that takes
+        # seconds for big postings, so it runs off the event loop
+        await asyncio.to_thread(_index_rows, index, rows)
+
+
+async def rank_applicants(session: AsyncSession, career: CareerPost, top_k: int) -> List[Tuple[int, float]]:
+    """Top-k (application_id, score) for a posting, refreshing its index first"""
+    index = _indexes.get(career.id)
+    if index is None:
+        index = _indexes[career.id] = RankingIndex(settings.RANKING_DIM)
+
+    async with index.lock:
+        await _refresh(session, career.id, index)
+        try:
+            # Stored again so the cache accounts for the grown matrix
+            _indexes[career.id] = index
+        except ValueError:
+            # Bigger than the whole budget: use it for this call only
+            _indexes.pop(career.id, None)
+        query = hash_features(
+            f"{career.title}\n{career.requirements}\n{career.description}",
+            settings.RANKING_DIM
+        )
+        # Scoring is pure NumPy; keep it off the event loop for big postings
+        return await asyncio.to_thread(index.rank, query, top_k)
+
+
+# Reverse matching: one RankingIndex whose rows are postings rather than
+# resumes, so a resume is scored against every posting in a single pass.
+_postings = RankingIndex(settings.RANKING_DIM)
+_posting_details: Dict[int, Dict[str, Any]] = {}
+
+
+def _posting_text(career: CareerPost) -> str:
+    return f"{career.title}\n{career.requirements}\n{career.description}"
+
+
+def upsert_posting(career: CareerPost) -> None:
+    """Refresh one posting's row right after it is created or updated"""
+    _postings.add(career.id, _posting_text(career))
+    _postings.stamps[career.id] = career.updated_at
+    _posting_details[career.id] = {"title": career.title, "location": career.location}
+
+
+async def _refresh_postings(session: AsyncSession) -> None:
+    # Picks up postings written by other workers since the last refresh
+    careers = (await session.exec(
+        select(CareerPost)
+        .where(CareerPost.updated_at >= _refresh_since(_postings))
+        .order_by(CareerPost.updated_at)
+    )).all()
+    for career in careers:
+        if _postings.stamps.get(career.id) != career.updated_at:
+            upsert_posting(career)
+        _postings.watermark = max(_postings.watermark, career.updated_at)
+
+
+async def match_postings(
+    session: AsyncSession,
+    resume_text: str,
+    top_k: int,
+    exclude_career_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Best matching postings for a resume, best first"""
+    async with _postings.lock:
+        await _refresh_postings(session)
+        ranked = _postings.rank(hash_features(resume_text, settings.RANKING_DIM), top_k + 1)
+
+    return [
+        {"career_id": career_id, "score": round(score, 4), **_posting_details[career_id]}
+        for career_id, score in ranked
+        if career_id != exclude_career_id and score >= settings.MATCH_MIN_SCORE
+    ][:top_k]
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy.dialects.postgresql import insert
+from conf.config import settings
+from models.model import ApplicationAnalysis, ApplicationStatus
+from services.utils import compress_text
+
+logger = logging.getLogger(__name__)
+
+# Bounded in-process screening queue drained by a fixed set of worker tasks.
+# The number of workers is the concurrency cap; the queue size is how much
+# work we accept before /apply starts returning 503.
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+_feeders: Set[asyncio.Task] = set()  # Retries and rescreens waiting for queue room
+
+
+async def _worker(handler: Callable[..., Awaitable[Any]]) -> None:
+    while True:
+        args = await _queue.get()
+        try:
+            await handler(*args)
+        except Exception as e:
+            logger.error(f"Screening worker error: {str(e)}", exc_info=True)
+        finally:
+            _queue.task_done()
+
+
+def start_screening_workers(handler: Callable[..., Awaitable[Any]]) -> None:
+    """Create the screening queue and spawn its worker tasks"""
+    global _queue
+    _queue = asyncio.Queue(maxsize=settings.SCREENING_QUEUE_SIZE)
+    for i in range(settings.SCREENING_CONCURRENCY):
+        _workers.append(asyncio.create_task(_worker(handler), name=f"screening-worker-{i}"))
+    logger.info(
+        f"Started {settings.SCREENING_CONCURRENCY} screening workers "
+        f"(queue size {settings.SCREENING_QUEUE_SIZE})"
+    )
+
+
+async def stop_screening_workers() -> None:
+    # Jobs still waiting to be queued leave their applications pending
+    for task in [*_workers, *_feeders]:
+        task.cancel()
+    await asyncio.gather(*_workers, *_feeders, return_exceptions=True)
+    _workers.clear()
+    _feeders.clear()
+
+
+def ensure_screening_capacity() -> None:
+    """Reject new work up front when the screening queue is saturated"""
+    if _queue is None or _queue.full():
+        logger.warning("Screening queue full - rejecting new application")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="We are processing a high volume of applications. Please try again shortly.",
+            headers={"Retry-After": "30"}
+        )
+
+
+def enqueue_screening(*args: Any) -> None:
+    """Queue a screening job; raises asyncio.QueueFull if capacity ran out"""
+    _queue.put_nowait(args)
+
+
+def _feed(jobs: List[Tuple[Any, ...]], delay: float = 0) -> None:
+    async def feed() -> None:
+        await asyncio.sleep(delay)
+        for args in jobs:
+            # Waits for room rather than failing when the queue is full
+            await _queue.put(args)
+
+    task = asyncio.create_task(feed())
+    _feeders.add(task)
+    task.add_done_callback(_feeders.discard)
+
+
+def retry_screening(delay: float, *args: Any) -> None:
+    """Queue a screening job again after delay seconds"""
+    _feed([args], delay)
+
+
+def enqueue_screenings(jobs: List[Tuple[Any, ...]]) -> None:
+    """Queue many screening jobs in the background as the workers drain"""
+    _feed(jobs)
+
+
+def screening_queue_depth() -> int:
+    return _queue.qsize() if _queue is not None else 0
+
+
+def match_score_of(analysis: Dict[str, Any]) -> int:
+    try:
+        return max(0, min(100, int(float(analysis.get("match_score", 0)))))
+    except (TypeError, ValueError):
+        return 0
+
+
+def status_for_analysis(analysis: Dict[str, Any]) -> ApplicationStatus:
+    # Pre-screen results carry their own decision
+    if analysis.get("decision"):
+        return ApplicationStatus(analysis["decision"])
+    if match_score_of(analysis) < settings.MIN_MATCH_SCORE:
+        return ApplicationStatus.rejected
+    return ApplicationStatus.viewed
+
+
+def analysis_record(
+    application_id: int,
+    analysis: Dict[str, Any],
+    resume_text: str,
+    prompt_version: str,
+    model_name: str
+) -> Dict[str, Any]:
+    return {
+        "application_id": application_id,
+        "analysis": analysis,
+        "resume_text": compress_text(resume_text),
+        "prompt_version": prompt_version,
+        "model_name": model_name,
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def upsert_analyses(records: List[Dict[str, Any]]):
+    """Single INSERT .. ON CONFLICT statement storing a batch of analyses"""
+    stmt = insert(ApplicationAnalysis).values(records)
+    return stmt.on_conflict_do_update(
+        index_elements=[ApplicationAnalysis.application_id],
+        set_={
+            "analysis": stmt.excluded.analysis,
+            "resume_text": stmt.excluded.resume_text,
+            "prompt_version": stmt.excluded.prompt_version,
+            "model_name": stmt.excluded.model_name,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
@@ -0,0 +1,170 @@
+import hashlib
+import logging
+import os
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, NamedTuple
+import aiofiles
+import aiofiles.os
+import magic
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+from conf.config import settings
+from models.model import FileBlob
+from services.metrics import UPLOAD_BYTES, UPLOAD_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Uploads are stored once per distinct content under blobs/<aa>/<sha256><ext>.
+# FileBlob.ref_count tracks how many applications point at each blob.
+# Applications are never deleted, so references only accumulate; the files
+# collect_garbage removes are the ones that never got a FileBlob row.
+BLOB_DIR = Path(settings.UPLOAD_DIR) / "blobs"
+TMP_DIR = Path(settings.UPLOAD_DIR) / "tmp"
+
+ALLOWED_MIME_TYPES = {
+    "application/pdf": ".pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ".docx",
+}
+
+
+class StoredFile(NamedTuple):
+    path: str
+    sha256: str
+    size: int
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large. Max size: {settings.MAX_FILE_SIZE} bytes"
+    )
+
+
+def blob_path(sha256: str, ext: str) -> Path:
+    return BLOB_DIR / sha256[:2] / f"{sha256}{ext}"
+
+
+async def store_upload(file: UploadFile) -> StoredFile:
+    """Stream an upload into content-addressed storage.
+
+    The size limit is enforced while streaming, so an oversized upload is
+    rejected after at most MAX_FILE_SIZE + one chunk bytes hit the disk.
+    """
+    if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+        raise _too_large()
+
+    started = time.perf_counter()
+    head = await file.read(2048)
+    ext = ALLOWED_MIME_TYPES.get(magic.from_buffer(head, mime=True))
+    if not ext:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid file type. Allowed: {settings.ALLOWED_FILE_TYPES}"
+        )
+
+    await aiofiles.os.makedirs(TMP_DIR, exist_ok=True)
+    tmp_path = TMP_DIR / f"{uuid.uuid4()}{ext}"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(tmp_path, "wb") as buffer:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > settings.MAX_FILE_SIZE:
+                    raise _too_large()
+                digest.update(chunk)
+                await buffer.write(chunk)
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+
+        sha256 = digest.hexdigest()
+        final_path = blob_path(sha256, ext)
+        await aiofiles.os.makedirs(final_path.parent, exist_ok=True)
+        if await aiofiles.os.path.exists(final_path):
+            # Identical content already stored; refresh mtime so the GC grace
+            # period restarts for this upload
+            await aiofiles.os.remove(tmp_path)
+            os.utime(final_path)
+        else:
+            await aiofiles.os.replace(tmp_path, final_path)
+
+        logger.debug(f"Stored upload {sha256} ({size} bytes)")
+        UPLOAD_BYTES.observe(size)
+        UPLOAD_DURATION.observe(time.perf_counter() - started)
+        return StoredFile(str(final_path), sha256, size)
+
+    except HTTPException:
+        await _discard(tmp_path)
+        raise
+    except Exception as e:
+        await _discard(tmp_path)
+        logger.error(f"File save error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to save uploaded file"
+        )
+
+
+async def _discard(path: Path) -> None:
+    try:
+        if await aiofiles.os.path.exists(path):
+            await aiofiles.os.remove(path)
+    except OSError as e:
+        logger.warning(f"Failed to discard temp upload {path}: {str(e)}")
+
+
+def acquire_blobs(files: Iterable[StoredFile]):
+    """Statement adding one reference per stored file; run it in the same
+    transaction that persists the rows pointing at the files"""
+    counts = Counter(files)
+    stmt = insert(FileBlob).values([
+        {
+            "sha256": stored.sha256,
+            "path": stored.path,
+            "size": stored.size,
+            "ref_count": count,
+            "created_at": datetime.utcnow(),
+        }
+        for stored, count in counts.items()
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=[FileBlob.sha256],
+        set_={"ref_count": FileBlob.ref_count + stmt.excluded.ref_count}
+    )
+
+
+def collect_garbage(session: Session) -> int:
+    """Delete unreferenced blobs and stale temp files; returns files removed"""
+    cutoff = time.time() - settings.UPLOAD_GC_GRACE
+    removed = 0
+
+    # Files that never got a reference, e.g. uploads for a missing job
+    known = set(session.exec(select(FileBlob.path)).all())
+    for root, _, names in os.walk(BLOB_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            if path in known:
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+
+    if TMP_DIR.exists():
+        for tmp in TMP_DIR.iterdir():
+            try:
+                if tmp.stat().st_mtime < cutoff:
+                    tmp.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+
+    logger.info(f"Upload GC removed {removed} files")
+    return removed
@@ -1,95 +1,252 @@
+import asyncio
+import multiprocessing
 import os
-import magic
-import uuid
-from typing import Optional
-from fastapi import UploadFile, HTTPException
+import threading
+from typing import Any, Optional, Tuple
+from fastapi import HTTPException
 from conf.config import settings
-from pathlib import Path
+from services.cache import TwoTierCache
 import logging
 import aiofiles
 import aiofiles.os
 import PyPDF2
 import io
+import zlib
 from docx import Document
 
 logger = logging.getLogger(__name__)
 
-async def save_uploaded_file(file: UploadFile, custom_filename: Optional[str] = None) -> str:
-    """Save uploaded file with UUID filename and return its path string"""
-    try:
-        # Create upload directory if needed
-        await aiofiles.os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-        
-        # Validate file type
-        file_type = magic.from_buffer(await file.read(1024), mime=True)
-        await file.seek(0)
-        
-        if not any(file_type.endswith(ft) for ft in [
-            "pdf", 
-            "vnd.openxmlformats-officedocument.wordprocessingml.document"
-        ]):
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file type. Allowed: {settings.ALLOWED_FILE_TYPES}"
-            )
-        
-        # Generate UUID filename with original extension
-        ext = Path(file.filename).suffix.lower() or (".pdf" if "pdf" in file_type else ".docx")
-        filename = f"{uuid.uuid4()}{ext}"
-        file_path = str(Path(settings.UPLOAD_DIR) / filename)
-        
-        # Save file async
-        async with aiofiles.open(file_path, "wb") as buffer:
-            while chunk := await file.read(8192):  # 8KB chunks
-                await buffer.write(chunk)
-        
-        # Verify file size
-        file_size = (await aiofiles.os.stat(file_path)).st_size
-        if file_size > settings.MAX_FILE_SIZE:
-            await aiofiles.os.remove(file_path)
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large. Max size: {settings.MAX_FILE_SIZE} bytes"
-            )
-        
-        logger.debug(f"File saved successfully: {file_path}")
-        return file_path
-    
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"File save error: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail="Failed to save uploaded file"
-        )
-    
-async def extract_text_from_file(file_path: str) -> str:
-    """Extract text from PDF or DOCX files with proper file handling"""
+def extract_text(
+    file_path: str,
+    max_pages: Optional[int] = None,
+    max_chars: Optional[int] = None
+) -> str:
+    """Extract text from a PDF or DOCX file, stopping at the page/char caps"""
+    max_pages = max_pages or settings.EXTRACTION_MAX_PAGES
+    max_chars = max_chars or settings.EXTRACTION_MAX_CHARS
+
+    if not os.path.exists(file_path):
+        raise ValueError("File does not exist")
+
+    parts = []
+    total = 0
+    if file_path.endswith('.pdf'):
+        with open(file_path, 'rb') as f:
+            reader = PyPDF2.PdfReader(io.BytesIO(f.read()))
+            # Single pass: each page is parsed exactly once
+            for index, page in enumerate(reader.pages):
+                if index >= max_pages or total >= max_chars:
+                    break
+                page_text = page.extract_text()
+                if page_text:
+                    parts.append(page_text)
+                    total += len(page_text) + 1
+
+    elif file_path.endswith('.docx'):
+        doc = Document(file_path)
+        for para in doc.paragraphs:
+            if total >= max_chars:
+                break
+            if para.text:
+                parts.append(para.text)
+                total += len(para.text) + 1
+    else:
+        raise ValueError("Unsupported file format")
+
+    text = "\n".join(parts)[:max_chars]
+    if not text.strip():
+        raise ValueError("No text content found in file")
+
+    return text.strip()
+
+
+# Extracted text keyed by upload content hash, so the same CV sent to many
+# postings is parsed once. The caps are part of the key since they shape the text.
+extraction_cache = TwoTierCache(
+    "extraction",
+    maxsize=settings.EXTRACTION_CACHE_SIZE,
+    ttl=settings.EXTRACTION_CACHE_TTL
+)
+
+
+def _extraction_cache_key(digest: str) -> str:
+    return f"{digest}:{settings.EXTRACTION_MAX_PAGES}:{settings.EXTRACTION_MAX_CHARS}"
+
+
+async def cached_extracted_text(digest: str) -> Optional[str]:
+    """Previously extracted text for an upload digest, without parsing"""
+    return await extraction_cache.aget(_extraction_cache_key(digest))
+
+
+def extract_text_cached(file_path: str, digest: Optional[str] = None) -> str:
+    """Synchronous, time-limited extraction that consults the extraction cache first"""
+    if digest:
+        cached = extraction_cache.get(_extraction_cache_key(digest))
+        if cached is not None:
+            return cached
+    text = extract_text_isolated(file_path, settings.EXTRACTION_TIMEOUT)
+    if digest:
+        extraction_cache.set(_extraction_cache_key(digest), text)
+    return text
+
+
+# Parsing is CPU bound and some PDFs are pathological, so it runs in
+# separate long-lived processes. Each worker parses one file at a time over
+# its own pipe, and a file's timeout only starts once a ready worker has it:
+# time queued behind other files or spent spawning a worker doesn't count,
+# and a file that overruns terminates its own worker and nobody else's.
+
+
+def _extraction_worker(conn) -> None:
+    """Child process loop: extract each path received until the pipe closes"""
+    conn.send(None)  # Ready; imports are done
+    while True:
+        try:
+            file_path = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send((True, extract_text(file_path)))
+        except Exception as e:
+            try:
+                conn.send((False, e))
+            except Exception:
+                # Exceptions that don't pickle still reach the caller
+                conn.send((False, ValueError(str(e))))
+
+
+class ExtractionWorker:
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_extraction_worker, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        # Blocks until the child has started; EOFError if it died doing so
+        self.conn.recv()
+
+    def exchange(self, file_path: str, timeout: float) -> Tuple[bool, Any]:
+        """(True, text) or (False, the child's exception). Raises only when
+        the worker itself is unusable: TimeoutError, or EOFError if it died"""
+        self.conn.send(file_path)
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"Extraction exceeded {timeout}s")
+        return self.conn.recv()
+
+    def close(self, kill: bool = False) -> None:
+        self.conn.close()
+        if kill:
+            self.process.terminate()
+
+
+class ExtractionPool:
+    """Fixed number of worker slots; workers start on first use"""
+
+    def __init__(self, size: int):
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: set = set()
+        self._slots: asyncio.Queue = asyncio.Queue()
+        for _ in range(size):
+            self._slots.put_nowait(None)
+
+    async def run(self, file_path: str, timeout: float) -> str:
+        worker: Optional[ExtractionWorker] = await self._slots.get()
+        try:
+            if worker is None or not worker.process.is_alive():
+                worker = await asyncio.to_thread(ExtractionWorker, self._context)
+                self._workers.add(worker)
+            ok, result = await asyncio.to_thread(worker.exchange, file_path, timeout)
+        except BaseException:
+            # Timed out, died or abandoned mid-file: this worker is done
+            if worker is not None:
+                worker.close(kill=True)
+                self._workers.discard(worker)
+                worker = None
+            raise
+        finally:
+            self._slots.put_nowait(worker)
+        if not ok:
+            raise result
+        return result
+
+    def shutdown(self, kill: bool = False) -> None:
+        for worker in self._workers:
+            worker.close(kill=kill)
+        self._workers.clear()
+
+
+_extraction_pool: Optional[ExtractionPool] = None
+
+# Synchronous callers (Celery screening tasks) get one worker per process
+_local_worker: Optional[ExtractionWorker] = None
+_local_lock = threading.Lock()
+
+
+def extract_text_isolated(file_path: str, timeout: float) -> str:
+    """Blocking extract_text on this process's extraction worker, killed and
+    replaced when a file overruns timeout"""
+    global _local_worker
+    with _local_lock:
+        worker = _local_worker
+        try:
+            if worker is None or not worker.process.is_alive():
+                worker = _local_worker = ExtractionWorker(multiprocessing.get_context("spawn"))
+            ok, result = worker.exchange(file_path, timeout)
+        except BaseException:
+            if worker is not None:
+                worker.close(kill=True)
+            _local_worker = None
+            raise
+    if not ok:
+        raise result
+    return result
+
+
+def _get_extraction_pool() -> ExtractionPool:
+    global _extraction_pool
+    if _extraction_pool is None:
+        _extraction_pool = ExtractionPool(settings.EXTRACTION_WORKERS)
+    return _extraction_pool
+
+
+def shutdown_extraction_pool(kill: bool = False) -> None:
+    """Stop the workers; idle ones exit when their pipe closes, kill=True
+    terminates them outright"""
+    global _extraction_pool
+    pool, _extraction_pool = _extraction_pool, None
+    if pool is not None:
+        pool.shutdown(kill=kill)
+
+
+async def extract_text_from_file(file_path: str, digest: Optional[str] = None) -> str:
+    """Extract text from PDF or DOCX files in the extraction process pool,
+    skipping the parse entirely when the content digest is already cached"""
     try:
+        if digest:
+            cached = await extraction_cache.aget(_extraction_cache_key(digest))
+            if cached is not None:
+                return cached
+
         if not await aiofiles.os.path.exists(file_path):
             raise ValueError("File does not exist")
-        
-        if file_path.endswith('.pdf'):
-            # Read PDF using file path directly
-            async with aiofiles.open(file_path, 'rb') as f:
-                pdf_content = await f.read()
-                reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
-                text = "\n".join([page.extract_text() for page in reader.pages if page.extract_text()])
-                
-        elif file_path.endswith('.docx'):
-            # Read DOCX using file path
-            doc = Document(file_path)
-            text = "\n".join([para.text for para in doc.paragraphs if para.text])
-        else:
-            raise ValueError("Unsupported file format")
-        
-        if not text.strip():
-            raise ValueError("No text content found in file")
-        
-        return text.strip()
-    
-    except PyPDF2.PdfReadError as e:
+
+        text = await _get_extraction_pool().run(file_path, settings.EXTRACTION_TIMEOUT)
+        if digest:
+            await extraction_cache.aset(_extraction_cache_key(digest), text)
+        return text
+
+    except TimeoutError:
+        logger.error(f"Text extraction timed out after {settings.EXTRACTION_TIMEOUT}s: {file_path}")
+        raise HTTPException(
+            status_code=400,
+            detail="Failed to extract text from file. The file took too long to process."
+        )
+    except EOFError:
+        logger.error(f"Extraction worker died on {file_path}")
+        raise HTTPException(
+            status_code=400,
+            detail="Failed to extract text from file. Please ensure the file is not password protected and contains readable text."
+        )
+    except PyPDF2.errors.PdfReadError as e:
         logger.error(f"PDF reading error: {str(e)}")
         raise HTTPException(
             status_code=400,
@@ -116,4 +273,12 @@ def validate_email(email: str) -> bool:
         "." in email.split("@")[-1] and 
         len(email.split("@")[0]) > 0 and
         len(email.split("@")[-1].split(".")[0]) > 0
-        )
\ No newline at end of file
+        )
+
+
+def compress_text(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def decompress_text(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
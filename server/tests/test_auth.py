@@ -0,0 +1,135 @@
+import datetime
+import time
+import jwt
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from services.auth import FirebaseTokenVerifier, PublicKeyCache
+
+PROJECT_ID = "test-project"
+KID = "test-kid"
+
+
+@pytest.fixture(scope="module")
+def signing_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture(scope="module")
+def certificate(signing_key):
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken.test")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(signing_key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(signing_key, hashes.SHA256())
+    )
+    return cert.public_bytes(serialization.Encoding.PEM).decode("utf-8")
+
+
+@pytest.fixture
+def fetches(certificate):
+    """Stands in for Google's cert endpoint and records each fetch"""
+    calls = []
+
+    def fetcher():
+        calls.append(time.time())
+        return {KID: certificate}, 3600
+
+    fetcher.calls = calls
+    return fetcher
+
+
+@pytest.fixture
+def make_token(signing_key):
+    def make(kid=KID, **overrides):
+        now = int(time.time())
+        claims = {
+            "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+            "aud": PROJECT_ID,
+            "sub": "user-1",
+            "iat": now,
+            "exp": now + 3600,
+            "auth_time": now,
+            "firebase": {"sign_in_provider": "google.com"},
+        }
+        claims.update(overrides)
+        return jwt.encode(claims, signing_key, algorithm="RS256", headers={"kid": kid})
+    return make
+
+
+def make_verifier(fetcher, token_ttl=300):
+    return FirebaseTokenVerifier(PROJECT_ID, keys=PublicKeyCache(fetcher), token_ttl=token_ttl)
+
+
+def test_valid_token(fetches, make_token):
+    claims = make_verifier(fetches).verify(make_token())
+    assert claims["uid"] == "user-1"
+    assert claims["firebase"]["sign_in_provider"] == "google.com"
+
+
+def test_expired_token(fetches, make_token):
+    token = make_token(iat=int(time.time()) - 7200, exp=int(time.time()) - 3600)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        make_verifier(fetches).verify(token)
+
+
+def test_wrong_audience(fetches, make_token):
+    with pytest.raises(jwt.InvalidAudienceError):
+        make_verifier(fetches).verify(make_token(aud="other-project"))
+
+
+def test_wrong_issuer(fetches, make_token):
+    with pytest.raises(jwt.InvalidIssuerError):
+        make_verifier(fetches).verify(make_token(iss="https://securetoken.google.com/other-project"))
+
+
+def test_unknown_kid(fetches, make_token):
+    verifier = make_verifier(fetches)
+    verifier.verify(make_token())
+    with pytest.raises(jwt.InvalidTokenError, match="Unknown signing key"):
+        verifier.verify(make_token(kid="rotated-away"))
+    # Within MIN_REFRESH_INTERVAL an unknown kid doesn't refetch
+    assert len(fetches.calls) == 1
+
+
+def test_cache_hit_skips_verification(fetches, make_token, monkeypatch):
+    verifier = make_verifier(fetches)
+    token = make_token()
+    claims = verifier.verify(token)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached token was decoded again")
+
+    monkeypatch.setattr(jwt, "decode", fail)
+    assert verifier.verify(token) is claims
+
+
+def test_cache_hit_bounded_by_exp(fetches, make_token, monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    verifier = make_verifier(fetches, token_ttl=300)
+    token = make_token(exp=int(now[0]) + 30)
+    verifier.verify(token)
+    assert verifier.cached(token) is not None
+
+    now[0] += 31
+    assert verifier.cached(token) is None
+
+
+def test_cache_hit_bounded_by_ttl(fetches, make_token, monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    verifier = make_verifier(fetches, token_ttl=60)
+    token = make_token()
+    verifier.verify(token)
+
+    now[0] += 61
+    assert verifier.cached(token) is None
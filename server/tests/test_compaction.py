@@ -0,0 +1,71 @@
+from llm.compaction import compact_text, estimate_tokens, split_sections
+
+RESUME = """
+Jane Doe
+jane@example.com
+
+Page 1 of 2
+Summary
+Backend engineer   building\tAPIs.
+
+Skills
+Python, FastAPI, PostgreSQL
+
+Experience
+Acme Corp - Senior Engineer
+Built the billing service.
+Page 2 of 2
+Jane Doe
+
+Education
+BSc Computer Science
+
+References available upon request
+"""
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("x" * 400) == 101
+
+
+def test_split_sections():
+    sections = split_sections(["Jane Doe", "Skills", "Python", "Work Experience", "Acme"])
+    assert sections == [
+        ("header", ["Jane Doe"]),
+        ("skills", ["Skills", "Python"]),
+        ("experience", ["Work Experience", "Acme"]),
+    ]
+
+
+def test_long_lines_are_not_headings():
+    line = "Skills " + "x" * 60
+    assert split_sections([line]) == [("header", [line])]
+
+
+def test_boilerplate_and_whitespace_removed():
+    text = compact_text(RESUME, 1000).text
+    assert "Page 1 of 2" not in text
+    assert "References available" not in text
+    assert "Backend engineer building APIs." in text
+    # Repeated short lines (page headers) are kept once
+    assert text.count("Jane Doe") == 1
+
+
+def test_fits_budget_and_prefers_skills():
+    resume = "\n".join(
+        ["Skills", "Python, FastAPI, PostgreSQL"]
+        + ["Education"] + [f"Course {i} with a long description of what was covered" for i in range(50)]
+    )
+    result = compact_text(resume, 40)
+    assert result.tokens_after <= 40 + 2
+    assert "Python, FastAPI, PostgreSQL" in result.text
+    assert result.tokens_saved > 0
+
+
+def test_every_section_gets_a_share():
+    resume = "\n".join(
+        ["Experience"] + [f"Role {i}: shipped feature number {i} to production" for i in range(100)]
+        + ["Education", "BSc Computer Science"]
+    )
+    assert "BSc Computer Science" in compact_text(resume, 60).text
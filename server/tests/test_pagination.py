@@ -0,0 +1,30 @@
+import base64
+import datetime
+import pytest
+from fastapi import HTTPException
+from services.pagination import decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    created = datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc)
+    cursor = encode_cursor(created, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created, 42)
+
+
+def test_round_trip_naive_timestamp():
+    created = datetime.datetime(2024, 5, 1, 12, 30)
+    assert decode_cursor(encode_cursor(created, 7)) == (created, 7)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    base64.urlsafe_b64encode(b'{"t": "2024-05-01T12:30:00"}').decode(),
+    base64.urlsafe_b64encode(b'{"t": "yesterday", "id": 1}').decode(),
+    base64.urlsafe_b64encode(b'{"t": "2024-05-01T12:30:00", "id": "abc"}').decode(),
+    base64.urlsafe_b64encode(b'[1, 2]').decode(),
+])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor(cursor)
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,93 @@
+import json
+import pytest
+from llm.parsing import ResumeAnalysis, extract_json, parse_analysis, parse_batch_analyses
+
+ANALYSIS = {"match_score": 80, "strengths": ["python"], "weaknesses": [], "suggested_questions": []}
+
+
+def test_extract_plain_json():
+    assert extract_json(json.dumps(ANALYSIS)) == ANALYSIS
+
+
+def test_extract_fenced_json():
+    raw = f"Here you go:\n```json\n{json.dumps(ANALYSIS)}\n```\nGood luck!"
+    assert extract_json(raw) == ANALYSIS
+
+
+def test_extract_json_surrounded_by_prose():
+    raw = f"The analysis is {json.dumps(ANALYSIS)} as requested."
+    assert extract_json(raw) == ANALYSIS
+
+
+def test_extract_json_ignores_brackets_inside_strings():
+    raw = 'Result: {"strengths": ["uses } and ] freely"], "match_score": 5} trailing'
+    assert extract_json(raw) == {"strengths": ["uses } and ] freely"], "match_score": 5}
+
+
+def test_extract_json_with_trailing_commas():
+    raw = '{"match_score": 70, "strengths": ["a", "b",],}'
+    assert extract_json(raw) == {"match_score": 70, "strengths": ["a", "b"]}
+
+
+def test_extract_json_without_json():
+    with pytest.raises(ValueError):
+        extract_json("I could not analyze this resume.")
+
+
+@pytest.mark.parametrize("value, expected", [
+    (85, 85),
+    (85.6, 86),
+    ("85", 85),
+    (" 85% ", 85),
+    (140, 100),
+    (-5, 0),
+])
+def test_score_coercion(value, expected):
+    assert ResumeAnalysis.model_validate({"match_score": value}).match_score == expected
+
+
+@pytest.mark.parametrize("value", [None, [80], {"score": 80}, True, "high", "inf", float("nan")])
+def test_bad_scores_raise_value_error(value):
+    with pytest.raises(ValueError):
+        ResumeAnalysis.model_validate({"match_score": value})
+
+
+def test_list_coercion():
+    analysis = ResumeAnalysis.model_validate({
+        "match_score": 50,
+        "strengths": "one strength",
+        "weaknesses": None,
+        "suggested_questions": [{"q": "Why?"}, "How?"],
+        "unexpected": "ignored",
+    })
+    assert analysis.strengths == ["one strength"]
+    assert analysis.weaknesses == []
+    assert analysis.suggested_questions == ['{"q": "Why?"}', "How?"]
+
+
+def test_bad_list_raises_value_error():
+    with pytest.raises(ValueError):
+        ResumeAnalysis.model_validate({"match_score": 50, "strengths": 3})
+
+
+def test_parse_analysis_fills_defaults():
+    assert parse_analysis('```\n{"match_score": "60"}\n```') == {
+        "match_score": 60, "strengths": [], "weaknesses": [], "suggested_questions": []
+    }
+
+
+def test_batch_keeps_valid_entries_only():
+    raw = json.dumps({
+        "1": ANALYSIS,
+        "2": {"match_score": None},
+        "4": {"match_score": 10},
+    })
+    analyses = parse_batch_analyses(raw, [1, 2, 3, 4])
+    assert sorted(analyses) == [1, 4]
+    assert analyses[1]["match_score"] == 80
+    assert analyses[4]["strengths"] == []
+
+
+def test_batch_that_is_not_an_object():
+    with pytest.raises(ValueError):
+        parse_batch_analyses(json.dumps([ANALYSIS]), [1])
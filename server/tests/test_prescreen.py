@@ -0,0 +1,51 @@
+import pytest
+from conf.config import settings
+from services.prescreen import MAX_KEYWORDS, extract_requirement_keywords, prescreen, tokenize
+
+
+def test_tokenize_keeps_language_names():
+    assert {"c++", "c#", "node.js", "python"} <= tokenize("Python, C++, C# and Node.js.")
+
+
+def test_keywords_drop_stopwords_numbers_and_duplicates():
+    keywords = extract_requirement_keywords(
+        "5+ years of experience with Python and Django. Strong Python skills; C or R is a plus."
+    )
+    assert keywords == ["python", "django", "c", "r"]
+
+
+def test_keywords_are_capped():
+    requirements = " ".join(f"tool{i}" for i in range(MAX_KEYWORDS + 10))
+    assert len(extract_requirement_keywords(requirements)) == MAX_KEYWORDS
+
+
+def test_clear_reject(monkeypatch):
+    monkeypatch.setattr(settings, "PRESCREEN_ENABLED", True)
+    analysis = prescreen(["python", "django", "postgresql", "redis"] * 3, "Pastry chef")
+    assert analysis["decision"] == "rejected"
+    assert analysis["match_score"] == 0
+    assert analysis["matched_keywords"] == []
+
+
+def test_clear_pass(monkeypatch):
+    monkeypatch.setattr(settings, "PRESCREEN_ENABLED", True)
+    analysis = prescreen(["python", "django"], "Python developer, Django and Celery")
+    assert analysis["decision"] == "viewed"
+    assert analysis["match_score"] == 100
+    assert analysis["missing_keywords"] == []
+
+
+def test_ambiguous_goes_to_the_model(monkeypatch):
+    monkeypatch.setattr(settings, "PRESCREEN_ENABLED", True)
+    assert prescreen(["python", "django", "redis", "kafka"], "Python and Redis") is None
+
+
+@pytest.mark.parametrize("keywords", [[], None])
+def test_no_keywords(keywords, monkeypatch):
+    monkeypatch.setattr(settings, "PRESCREEN_ENABLED", True)
+    assert prescreen(keywords or [], "anything") is None
+
+
+def test_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "PRESCREEN_ENABLED", False)
+    assert prescreen(["python"], "Pastry chef") is None